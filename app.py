@@ -1,26 +1,61 @@
 import os, sys
-from flask import Flask, render_template_string, request, redirect, flash
+from flask import Flask, render_template, request, redirect, flash, g, make_response, jsonify
+from flask import url_for, has_app_context, has_request_context, before_render_template, template_rendered
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import get_flashed_messages
+from jinja2 import ChoiceLoader, DictLoader
 import sqlite3
 from datetime import date
-import pandas as pd
 from flask import session
-from openpyxl import Workbook
 from flask import send_file
 import tempfile
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 import json
 import webbrowser
 import threading
-import docx
-from PyPDF2 import PdfReader
 import io
+import argparse
+import csv
+import gzip
+import hashlib
+import importlib
+from collections import OrderedDict, deque
+import click
+import time
+import signal
+import socket
+import queue
+import uuid
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class LazyModule:
+    """Stand-in that imports the real module on first attribute access.
+
+    pandas, openpyxl, python-docx, PyPDF2 and NumPy are only needed by the
+    import, export and report routes, so they stay out of the startup path.
+    app.spec lists them as hiddenimports because PyInstaller cannot see
+    these imports.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
 
+pd = LazyModule("pandas")
+openpyxl = LazyModule("openpyxl")
+docx = LazyModule("docx")
+PyPDF2 = LazyModule("PyPDF2")
+np = LazyModule("numpy")
 
 def init_db_if_needed():
-    conn = get_db()
+    conn = connect_db()
     c = conn.cursor()
 
     c.execute("""
@@ -41,29 +76,334 @@ def init_db_if_needed():
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         roll_no TEXT,
         name TEXT,
-        class_id INTEGER,
-        FOREIGN KEY(class_id) REFERENCES classes(id)
+        class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE
     )
     """)
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS attendance (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id INTEGER,
+        student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
         date TEXT,
         status TEXT,
-        od_reason TEXT,
-        FOREIGN KEY(student_id) REFERENCES students(id)
+        od_reason TEXT
     )
     """)
 
-   
-
-
     conn.commit()
+    migrate_db(conn)
+
+    # A new install starts from the small bundled copy, which is cheap to
+    # rebuild with incremental auto-vacuum; big files use `flask compact-db`
+    if (conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+            and conn.execute("PRAGMA page_count").fetchone()[0] <= AUTO_COMPACT_MAX_PAGES):
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
     conn.close()
 
 
+# Per-student counters recomputed from the raw attendance rows
+STUDENT_STATS_AGGREGATE_SQL = """
+    SELECT s.id,
+           COUNT(a.id),
+           COALESCE(SUM(a.status = 'Present'), 0),
+           COALESCE(SUM(a.status = 'OD'), 0),
+           COUNT(a.id) - COALESCE(SUM(a.status IN ('Present','OD')), 0),
+           MAX(a.date)
+    FROM students s
+    LEFT JOIN attendance a ON a.student_id = s.id
+    GROUP BY s.id
+"""
+
+# Keep student_stats in step with every write to students/attendance.
+# Plain INSERT ... WHERE NOT EXISTS is used instead of INSERT OR IGNORE
+# because an outer UPSERT overrides the conflict policy inside triggers.
+STUDENT_STATS_TRIGGERS_SQL = """
+    CREATE TRIGGER IF NOT EXISTS trg_students_insert_stats
+    AFTER INSERT ON students BEGIN
+        INSERT INTO student_stats (student_id)
+        SELECT NEW.id
+        WHERE NOT EXISTS (SELECT 1 FROM student_stats WHERE student_id = NEW.id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_students_delete_stats
+    AFTER DELETE ON students BEGIN
+        DELETE FROM student_stats WHERE student_id = OLD.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_insert_stats
+    AFTER INSERT ON attendance BEGIN
+        INSERT INTO student_stats (student_id)
+        SELECT NEW.student_id
+        WHERE NOT EXISTS (SELECT 1 FROM student_stats WHERE student_id = NEW.student_id);
+        UPDATE student_stats SET
+            total = total + 1,
+            present = present + (NEW.status IS 'Present'),
+            od = od + (NEW.status IS 'OD'),
+            absent = absent + (NEW.status IS NOT 'Present' AND NEW.status IS NOT 'OD'),
+            last_date = MAX(COALESCE(last_date, NEW.date), NEW.date)
+        WHERE student_id = NEW.student_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_delete_stats
+    AFTER DELETE ON attendance BEGIN
+        UPDATE student_stats SET
+            total = total - 1,
+            present = present - (OLD.status IS 'Present'),
+            od = od - (OLD.status IS 'OD'),
+            absent = absent - (OLD.status IS NOT 'Present' AND OLD.status IS NOT 'OD'),
+            last_date = (SELECT MAX(date) FROM attendance WHERE student_id = OLD.student_id)
+        WHERE student_id = OLD.student_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_update_stats
+    AFTER UPDATE OF student_id, date, status ON attendance BEGIN
+        UPDATE student_stats SET
+            total = total - 1,
+            present = present - (OLD.status IS 'Present'),
+            od = od - (OLD.status IS 'OD'),
+            absent = absent - (OLD.status IS NOT 'Present' AND OLD.status IS NOT 'OD'),
+            last_date = (SELECT MAX(date) FROM attendance WHERE student_id = OLD.student_id)
+        WHERE student_id = OLD.student_id;
+        INSERT INTO student_stats (student_id)
+        SELECT NEW.student_id
+        WHERE NOT EXISTS (SELECT 1 FROM student_stats WHERE student_id = NEW.student_id);
+        UPDATE student_stats SET
+            total = total + 1,
+            present = present + (NEW.status IS 'Present'),
+            od = od + (NEW.status IS 'OD'),
+            absent = absent + (NEW.status IS NOT 'Present' AND NEW.status IS NOT 'OD'),
+            last_date = (SELECT MAX(date) FROM attendance WHERE student_id = NEW.student_id)
+        WHERE student_id = NEW.student_id;
+    END;
+"""
+
+# Bump roster_versions on any change to a class's students
+ROSTER_VERSION_TRIGGERS_SQL = """
+    CREATE TRIGGER IF NOT EXISTS trg_students_insert_roster
+    AFTER INSERT ON students BEGIN
+        INSERT INTO roster_versions (class_id)
+        SELECT NEW.class_id
+        WHERE NOT EXISTS (SELECT 1 FROM roster_versions WHERE class_id = NEW.class_id);
+        UPDATE roster_versions SET version = version + 1 WHERE class_id = NEW.class_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_students_delete_roster
+    AFTER DELETE ON students BEGIN
+        UPDATE roster_versions SET version = version + 1 WHERE class_id = OLD.class_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_students_update_roster
+    AFTER UPDATE OF roll_no, name, class_id ON students BEGIN
+        INSERT INTO roster_versions (class_id)
+        SELECT NEW.class_id
+        WHERE NOT EXISTS (SELECT 1 FROM roster_versions WHERE class_id = NEW.class_id);
+        UPDATE roster_versions SET version = version + 1
+        WHERE class_id IN (OLD.class_id, NEW.class_id);
+    END;
+"""
+
+# Current column definitions, used when a migration has to rebuild a table
+STUDENTS_COLUMNS = [
+    "id INTEGER PRIMARY KEY AUTOINCREMENT",
+    "roll_no TEXT",
+    "name TEXT",
+    "class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE",
+]
+
+ATTENDANCE_COLUMNS = [
+    "id INTEGER PRIMARY KEY AUTOINCREMENT",
+    "student_id INTEGER REFERENCES students(id) ON DELETE CASCADE",
+    "date TEXT",
+    "status TEXT",
+    "od_reason TEXT",
+]
+
+
+def rebuild_table_sql(conn, table, columns):
+    """Script that recreates table with new column definitions and copies
+    its rows across, keeping any extra columns an older schema added.
+    Indexes and triggers on the table are dropped with it."""
+    existing = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    defined = {column.split()[0] for column in columns}
+    extra = [
+        f"{name} {decl_type}" + (f" DEFAULT {default}" if default is not None else "")
+        for _, name, decl_type, _, default, _ in existing
+        if name not in defined
+    ]
+    definitions = ",\n        ".join(columns + extra)
+    copied = ", ".join(name for _, name, *_ in existing)
+    rebuilt = f"{table}_rebuild"
+
+    return f"""
+    CREATE TABLE {rebuilt} (
+        {definitions}
+    );
+    INSERT INTO {rebuilt} ({copied}) SELECT {copied} FROM {table};
+    DELETE FROM sqlite_sequence WHERE name = '{rebuilt}';
+    INSERT INTO sqlite_sequence (name, seq)
+    SELECT '{rebuilt}', seq FROM sqlite_sequence WHERE name = '{table}';
+    DROP TABLE {table};
+    ALTER TABLE {rebuilt} RENAME TO {table};
+    """
+
+
+# Each entry upgrades the schema by one version; the applied version is
+# tracked in PRAGMA user_version, so only append new entries here.
+# An entry may also be a function of the connection returning the script.
+MIGRATIONS = [
+    # 1: indexes for the per-class and per-date lookups
+    """
+    CREATE INDEX IF NOT EXISTS idx_students_class_roll
+        ON students(class_id, roll_no);
+    CREATE INDEX IF NOT EXISTS idx_attendance_date_student
+        ON attendance(date, student_id);
+    """,
+    # 2: one attendance row per student per day (keep the latest duplicate)
+    """
+    DELETE FROM attendance
+    WHERE id NOT IN (
+        SELECT MAX(id) FROM attendance GROUP BY student_id, date
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date
+        ON attendance(student_id, date);
+    """,
+    # 3: student_stats counters, kept in sync with attendance by triggers
+    """
+    CREATE TABLE IF NOT EXISTS student_stats (
+        student_id INTEGER PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        present INTEGER NOT NULL DEFAULT 0,
+        od INTEGER NOT NULL DEFAULT 0,
+        absent INTEGER NOT NULL DEFAULT 0,
+        last_date TEXT
+    );
+
+    """ + STUDENT_STATS_TRIGGERS_SQL + """
+
+    INSERT OR REPLACE INTO student_stats (student_id, total, present, od, absent, last_date)
+    """ + STUDENT_STATS_AGGREGATE_SQL + """;
+    """,
+    # 4: recreate the student_stats triggers so they work under UPSERT
+    """
+    DROP TRIGGER IF EXISTS trg_students_insert_stats;
+    DROP TRIGGER IF EXISTS trg_students_delete_stats;
+    DROP TRIGGER IF EXISTS trg_attendance_insert_stats;
+    DROP TRIGGER IF EXISTS trg_attendance_delete_stats;
+    DROP TRIGGER IF EXISTS trg_attendance_update_stats;
+    """ + STUDENT_STATS_TRIGGERS_SQL,
+    # 5: session dates per class, filled in by save_attendance
+    """
+    CREATE TABLE IF NOT EXISTS class_dates (
+        class_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+        date TEXT NOT NULL,
+        PRIMARY KEY (class_id, date)
+    ) WITHOUT ROWID;
+
+    INSERT OR IGNORE INTO class_dates (class_id, date)
+    SELECT DISTINCT s.class_id, a.date
+    FROM attendance a
+    JOIN students s ON s.id = a.student_id
+    JOIN classes c ON c.id = s.class_id;
+    """,
+    # 6: background jobs (imports, large exports) and their outputs
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        class_id INTEGER,
+        state TEXT NOT NULL DEFAULT 'queued',
+        progress REAL NOT NULL DEFAULT 0,
+        message TEXT,
+        output_path TEXT,
+        output_name TEXT,
+        created REAL NOT NULL,
+        started REAL,
+        finished REAL,
+        expires REAL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires);
+    """,
+    # 7: per-class roster version, bumped on any student change, so cached
+    # rosters can be validated with one primary key lookup
+    """
+    CREATE TABLE IF NOT EXISTS roster_versions (
+        class_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT OR IGNORE INTO roster_versions (class_id) SELECT id FROM classes;
+
+    """ + ROSTER_VERSION_TRIGGERS_SQL,
+    # 8: ON DELETE CASCADE from classes to students to attendance, so a
+    # class is removed with one set-based DELETE
+    lambda conn: """
+    DELETE FROM students
+    WHERE class_id IS NOT NULL AND class_id NOT IN (SELECT id FROM classes);
+    DELETE FROM attendance WHERE student_id NOT IN (SELECT id FROM students);
+    DELETE FROM student_stats WHERE student_id NOT IN (SELECT id FROM students);
+    """ + rebuild_table_sql(conn, "students", STUDENTS_COLUMNS)
+      + rebuild_table_sql(conn, "attendance", ATTENDANCE_COLUMNS) + """
+    CREATE INDEX IF NOT EXISTS idx_students_class_roll
+        ON students(class_id, roll_no);
+    CREATE INDEX IF NOT EXISTS idx_attendance_date_student
+        ON attendance(date, student_id);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date
+        ON attendance(student_id, date);
+    """ + STUDENT_STATS_TRIGGERS_SQL + ROSTER_VERSION_TRIGGERS_SQL,
+    # 9: terms moved to the archive database; attendance dated before the
+    # latest cutoff lives there and is read-only
+    """
+    CREATE TABLE IF NOT EXISTS archived_terms (
+        cutoff TEXT PRIMARY KEY,
+        rows INTEGER NOT NULL DEFAULT 0,
+        archived_at REAL NOT NULL
+    );
+    """,
+]
+
+
+def migrate_db(conn):
+    """Apply pending MIGRATIONS in place, one transaction per version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    # Table rebuilds drop and rename parents of foreign keys, which must
+    # not cascade; foreign_keys can only be switched outside a transaction
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            if callable(script):
+                script = script(conn)
+            conn.executescript(
+                "BEGIN;\n" + script + f"\nPRAGMA user_version = {number};\nCOMMIT;"
+            )
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+
+
+def check_student_stats(conn):
+    """Return ids of students whose student_stats row disagrees with the raw rows"""
+    expected = {row[0]: row for row in conn.execute(STUDENT_STATS_AGGREGATE_SQL)}
+    actual = {
+        row[0]: row for row in conn.execute(
+            "SELECT student_id, total, present, od, absent, last_date FROM student_stats"
+        )
+    }
+    return sorted(sid for sid in expected.keys() | actual.keys()
+                  if expected.get(sid) != actual.get(sid))
+
+
+def rebuild_student_stats(conn):
+    """Recompute the whole student_stats table from the raw attendance rows"""
+    with conn:
+        conn.execute("DELETE FROM student_stats")
+        conn.execute(
+            "INSERT INTO student_stats (student_id, total, present, od, absent, last_date)"
+            + STUDENT_STATS_AGGREGATE_SQL
+        )
+
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -82,18 +422,10 @@ def get_attendance_status(percent):
         return {"status": "Defaulter", "badge": "🔴", "color": "#dc3545", "class": "defaulter"}
 
 
-def get_student_attendance_stats(student_id, db):
-    """Get detailed attendance stats for a student"""
-    total = db.execute(
-        "SELECT COUNT(*) FROM attendance WHERE student_id=?",
-        (student_id,)
-    ).fetchone()[0]
-
-    present = db.execute(
-        "SELECT COUNT(*) FROM attendance WHERE student_id=? AND status IN ('Present','OD')",
-        (student_id,)
-    ).fetchone()[0]
-
+def build_attendance_stats(total, present):
+    """Turn raw total/present counts into the stats dict used by every view"""
+    total = total or 0
+    present = present or 0
     absent = total - present
     percent = round((present / total) * 100, 2) if total else 0
     status_info = get_attendance_status(percent)
@@ -110,6 +442,424 @@ def get_student_attendance_stats(student_id, db):
     }
 
 
+def get_student_attendance_stats(student_id, db):
+    """Get detailed attendance stats for a student"""
+    row = db.execute(
+        "SELECT total, present + od FROM student_stats WHERE student_id=?",
+        (student_id,)
+    ).fetchone()
+
+    return build_attendance_stats(*(row or (0, 0)))
+
+
+STUDENT_STATS_SQL = """
+    SELECT s.id, s.roll_no, s.name, s.class_id,
+           st.total, st.present + st.od
+    FROM students s
+    LEFT JOIN student_stats st ON st.student_id = s.id
+    {where}
+    ORDER BY s.class_id, s.roll_no
+"""
+
+
+def _stats_rows(rows):
+    result = []
+    for sid, roll, name, cid, total, present in rows:
+        stats = build_attendance_stats(total, present)
+        stats.update({"id": sid, "roll": roll, "name": name, "class_id": cid})
+        result.append(stats)
+    return result
+
+
+def get_class_attendance_stats(class_id, db):
+    """Stats for every student of a class in one query, ordered by roll no"""
+    rows = db.execute(
+        STUDENT_STATS_SQL.format(where="WHERE s.class_id=?"),
+        (class_id,)
+    ).fetchall()
+    return _stats_rows(rows)
+
+
+STATS_COLUMNS = ["id", "roll", "name", "total", "present", "absent", "percent", "status"]
+
+
+def compact_stats(student_stats):
+    """Column names plus one list per student, for JSON responses"""
+    return {
+        "columns": STATS_COLUMNS,
+        "rows": [[s[c] for c in STATS_COLUMNS] for s in student_stats]
+    }
+
+
+def get_roster_for_date(class_id, day, db, limit=-1, offset=0):
+    """(id, roll_no, name, class_id, status, od_reason) per student of a class for one day"""
+    return db.execute("""
+        SELECT s.id, s.roll_no, s.name, s.class_id, a.status, a.od_reason
+        FROM students s
+        LEFT JOIN attendance a ON a.student_id = s.id AND a.date=?
+        WHERE s.class_id=?
+        ORDER BY s.roll_no, s.id
+        LIMIT ? OFFSET ?
+    """, (day, class_id, limit, offset)).fetchall()
+
+
+def get_student_history(student_id, db):
+    """(roll_no, name) and the dated attendance records of one student"""
+    student = db.execute(
+        "SELECT roll_no, name FROM students WHERE id=?",
+        (student_id,)
+    ).fetchone()
+
+    records = db.execute(
+        "SELECT date, status, od_reason FROM attendance WHERE student_id=? ORDER BY date",
+        (student_id,)
+    ).fetchall()
+
+    return student, records
+
+
+# Status codes stored in AttendanceMatrix; 0 means no record that day
+MATRIX_PRESENT, MATRIX_ABSENT, MATRIX_OD = 1, 2, 3
+MATRIX_CODES = {"Present": MATRIX_PRESENT, "Absent": MATRIX_ABSENT, "OD": MATRIX_OD}
+
+
+class AttendanceMatrix:
+    """A class's attendance history as a students x dates int8 matrix.
+
+    Rows follow roll number order and columns follow date order;
+    student_index and date_index map ids and ISO dates to positions. OD
+    reasons are kept in a sparse dict. Records with any other status count
+    as absent, the same as student_stats.
+    """
+
+    def __init__(self, class_id, students, dates, codes, reasons):
+        self.class_id = class_id
+        self.students = students
+        self.dates = dates
+        self.codes = codes
+        self.reasons = reasons
+        self.student_index = {sid: i for i, (sid, _, _) in enumerate(students)}
+        self.date_index = {day: j for j, day in enumerate(dates)}
+
+    @classmethod
+    def load(cls, class_id, db, start=None, end=None, student_id=None, source="attendance"):
+        """Matrix for a class, optionally limited to a date range or one student.
+
+        source is the table or view to read, see report_source().
+        """
+        start = start or "0000-00-00"
+        end = end or "9999-99-99"
+
+        if student_id is None:
+            students = get_roster(class_id, db).students
+            rows = db.execute(f"""
+                SELECT a.student_id, a.date, a.status, a.od_reason
+                FROM {source} a
+                JOIN students s ON a.student_id = s.id
+                WHERE s.class_id=? AND a.date BETWEEN ? AND ?
+            """, (class_id, start, end)).fetchall()
+            # The roster is a separate (possibly cached) read; skip students
+            # added to the class since it was taken
+            on_roster = {sid for sid, _, _ in students}
+            rows = [row for row in rows if row[0] in on_roster]
+        else:
+            # By id alone: students without a class (class_id NULL) have reports too
+            students = db.execute(
+                "SELECT id, roll_no, name FROM students WHERE id=?", (student_id,)
+            ).fetchall()
+            rows = db.execute(f"""
+                SELECT student_id, date, status, od_reason
+                FROM {source}
+                WHERE student_id=? AND date BETWEEN ? AND ?
+            """, (student_id, start, end)).fetchall() if students else []
+
+        dates = sorted({row[1] for row in rows})
+        matrix = cls(
+            class_id, students, dates,
+            np.zeros((len(students), len(dates)), dtype=np.int8), {}
+        )
+
+        if rows:
+            student_index, date_index = matrix.student_index, matrix.date_index
+            count = len(rows)
+            row_idx = np.fromiter((student_index[r[0]] for r in rows), dtype=np.intp, count=count)
+            col_idx = np.fromiter((date_index[r[1]] for r in rows), dtype=np.intp, count=count)
+            matrix.codes[row_idx, col_idx] = np.fromiter(
+                (MATRIX_CODES.get(r[2], MATRIX_ABSENT) for r in rows), dtype=np.int8, count=count
+            )
+            matrix.reasons = {
+                (student_index[sid], date_index[day]): reason
+                for sid, day, _, reason in rows if reason
+            }
+
+        return matrix
+
+    def totals(self):
+        """Recorded days per student"""
+        return np.count_nonzero(self.codes, axis=1)
+
+    def present_counts(self):
+        """Present + OD days per student"""
+        return np.count_nonzero((self.codes == MATRIX_PRESENT) | (self.codes == MATRIX_OD), axis=1)
+
+    def longest_absent_streaks(self):
+        """Longest run of consecutive absent sessions per student"""
+        run = np.zeros(len(self.students), dtype=np.int32)
+        best = np.zeros_like(run)
+        for column in (self.codes == MATRIX_ABSENT).T:
+            run = np.where(column, run + 1, 0)
+            np.maximum(best, run, out=best)
+        return best
+
+    def student_stats(self):
+        """Per-student stats in the same shape as get_class_attendance_stats"""
+        totals = self.totals().tolist()
+        present = self.present_counts().tolist()
+        result = []
+        for i, (sid, roll, name) in enumerate(self.students):
+            stats = build_attendance_stats(totals[i], present[i])
+            stats.update({"id": sid, "roll": roll, "name": name, "class_id": self.class_id})
+            result.append(stats)
+        return result
+
+    def student_records(self, row):
+        """Absent dates and (date, reason) OD records of one student row"""
+        codes = self.codes[row]
+        absent_dates = [self.dates[j] for j in np.flatnonzero(codes == MATRIX_ABSENT)]
+        od_records = [
+            (self.dates[j], self.reasons.get((row, j)))
+            for j in np.flatnonzero(codes == MATRIX_OD)
+        ]
+        return absent_dates, od_records
+
+
+def get_class_stats_for_range(class_id, db, start=None, end=None, source="attendance"):
+    """Per-student stats for a class, over the current term or a date range.
+
+    Current-term totals come straight from student_stats; a range or the
+    archive needs the raw records and goes through AttendanceMatrix.
+    """
+    if not start and not end and source == "attendance":
+        return get_class_attendance_stats(class_id, db)
+    return AttendanceMatrix.load(class_id, db, start, end, source=source).student_stats()
+
+
+def summarize_class_stats(student_stats):
+    """Safe/warning/defaulter counts and average percent for a list of student stats"""
+    total_students = len(student_stats)
+    safe = sum(1 for s in student_stats if s["status"] == "Safe")
+    warning = sum(1 for s in student_stats if s["status"] == "Warning")
+    defaulters = total_students - safe - warning
+    total_percent = sum(s["percent"] for s in student_stats)
+
+    return {
+        "total_students": total_students,
+        "safe": safe,
+        "warning": warning,
+        "defaulters": defaulters,
+        "avg_percent": round(total_percent / total_students, 2) if total_students else 0
+    }
+
+
+SUMMARY_CACHE_TTL = float(os.getenv("ATTENDANCE_SUMMARY_TTL", "60"))
+SUMMARY_CACHE_SIZE = 512
+
+
+class SummaryCache:
+    """In-process LRU of per-class dashboard summaries, keyed by class id.
+
+    Writes invalidate the classes they touch. The TTL bounds staleness
+    for changes made by other worker processes, which this one never sees.
+    """
+
+    def __init__(self, ttl=SUMMARY_CACHE_TTL, max_size=SUMMARY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a summary computed before a
+        # write cannot be stored after it
+        self.version = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, class_id):
+        with self._lock:
+            entry = self._entries.get(class_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(class_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, class_id, summary, version):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[class_id] = (time.monotonic() + self.ttl, summary)
+            self._entries.move_to_end(class_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *class_ids):
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            for class_id in class_ids:
+                self._entries.pop(class_id, None)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class_summaries = SummaryCache()
+
+
+def get_class_summaries(class_ids, db):
+    """Dashboard summary per class id, computing only cache misses"""
+    summaries = {}
+    missing = []
+    for cid in class_ids:
+        summary = class_summaries.get(cid)
+        if summary is None:
+            missing.append(cid)
+        else:
+            summaries[cid] = summary
+
+    if missing:
+        version = class_summaries.version
+        placeholders = ",".join("?" * len(missing))
+        rows = db.execute(
+            STUDENT_STATS_SQL.format(where=f"WHERE s.class_id IN ({placeholders})"),
+            missing
+        ).fetchall()
+
+        by_class = {cid: [] for cid in missing}
+        for stats in _stats_rows(rows):
+            by_class[stats["class_id"]].append(stats)
+
+        for cid, student_stats in by_class.items():
+            summary = summarize_class_stats(student_stats)
+            class_summaries.put(cid, summary, version)
+            summaries[cid] = summary
+
+    return summaries
+
+
+ROSTER_CACHE_MAX_STUDENTS = int(os.getenv("ATTENDANCE_ROSTER_CACHE_STUDENTS", "100000"))
+
+
+class Roster:
+    """One class's students in roll number order plus a roll -> id dict.
+
+    Roll numbers are keyed as stripped strings. version is the class's
+    roster_versions counter when the roster was read.
+    """
+
+    __slots__ = ("class_id", "version", "students", "ids", "by_roll")
+
+    def __init__(self, class_id, version, students):
+        self.class_id = class_id
+        self.version = version
+        self.students = students
+        self.ids = tuple(sid for sid, _, _ in students)
+        self.by_roll = {str(roll).strip(): sid for sid, roll, _ in students}
+
+
+class RosterCache:
+    """In-process LRU of Roster objects, bounded by the total student count.
+
+    Entries are checked against roster_versions, which triggers bump on
+    every student insert, update and delete, so rosters changed by other
+    worker processes are never served stale.
+    """
+
+    def __init__(self, max_students=ROSTER_CACHE_MAX_STUDENTS):
+        self.max_students = max_students
+        self._entries = OrderedDict()
+        self._students = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, class_id, version):
+        with self._lock:
+            roster = self._entries.get(class_id)
+            if roster is None or roster.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(class_id)
+            self.hits += 1
+            return roster
+
+    def put(self, roster):
+        with self._lock:
+            old = self._entries.pop(roster.class_id, None)
+            if old is not None:
+                self._students -= len(old.ids)
+            if len(roster.ids) > self.max_students:
+                return
+            self._entries[roster.class_id] = roster
+            self._students += len(roster.ids)
+            while self._students > self.max_students:
+                _, evicted = self._entries.popitem(last=False)
+                self._students -= len(evicted.ids)
+                self.evictions += 1
+
+    def invalidate(self, class_id):
+        with self._lock:
+            roster = self._entries.pop(class_id, None)
+            if roster is not None:
+                self._students -= len(roster.ids)
+            self.invalidations += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "classes": len(self._entries),
+                "students": self._students,
+                "max_students": self.max_students,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+roster_cache = RosterCache()
+
+
+def get_roster(class_id, db):
+    """Cached Roster for a class, reloaded when its roster version moves"""
+    row = db.execute(
+        "SELECT version FROM roster_versions WHERE class_id=?", (class_id,)
+    ).fetchone()
+    version = row[0] if row else 0
+
+    roster = roster_cache.get(class_id, version)
+    if roster is None:
+        students = tuple(db.execute(
+            "SELECT id, roll_no, name FROM students WHERE class_id=? ORDER BY roll_no",
+            (class_id,)
+        ))
+        roster = Roster(class_id, version, students)
+        roster_cache.put(roster)
+    return roster
+
+
 ROLL_KEYS = [
     "roll", "rollno", "roll_no",
     "reg", "regno", "register", "registerno",
@@ -147,15 +897,324 @@ def detect_columns(columns):
     return roll_col, name_col
 
 
+# ---------------------- Student import ----------------------
+IMPORT_BATCH_SIZE = 500
+PDF_MAX_PAGES = int(os.getenv("ATTENDANCE_PDF_MAX_PAGES", "500"))
+PDF_PAGES_PER_TASK = 10
+PDF_POOL_SIZE = max(1, min(4, (os.cpu_count() or 2) - 1))
+PDF_HEADER_LINES = ['roll no', 'name', 'roll', 'student']
+PDF_SKIP_WORDS = ['roll', 'name', 'date', 'page']
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool():
+    """Process pool for PDF text extraction, created on first use.
+
+    Workers are spawned, never forked: the pool starts from a job thread
+    while the server and writer threads may be holding locks.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_SIZE, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+
+def extract_pdf_pages(path, start, stop):
+    """Text of pages [start, stop) of a PDF; runs in the PDF process pool"""
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def parse_roster_text(text):
+    """Yield (roll, name) from 'Roll - Name' or 'Roll, Name' lines"""
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.lower() in PDF_HEADER_LINES:
+            continue
+
+        if ' - ' in line:
+            parts = line.split(' - ')
+        elif ',' in line:
+            parts = line.split(',')
+        else:
+            continue
+
+        if len(parts) >= 2:
+            roll = parts[0].strip()
+            name = parts[1].strip()
+
+            # Skip headers and footers
+            if roll and name and not any(word in roll.lower() for word in PDF_SKIP_WORDS):
+                yield roll, name
+
+
+def iter_pdf_students(path, page_count, status):
+    """Stream (roll, name) rows from a PDF, extracting pages in the pool"""
+    status["pages_done"] = 0
+    pool = get_pdf_pool()
+    futures = [
+        pool.submit(extract_pdf_pages, path, start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            texts = future.result()
+            for text in texts:
+                yield from parse_roster_text(text)
+            status["pages_done"] += len(texts)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def insert_new_students(conn, class_id, rows):
+    """Insert (roll, name) rows whose roll number the class does not have yet"""
+    placeholders = ",".join("?" * len(rows))
+    existing = {
+        roll for (roll,) in conn.execute(
+            f"SELECT roll_no FROM students WHERE class_id=? AND roll_no IN ({placeholders})",
+            [class_id, *(roll for roll, _ in rows)]
+        )
+    }
+
+    new_rows = []
+    for roll, name in rows:
+        if roll in existing:
+            continue
+        existing.add(roll)
+        new_rows.append((roll, name, class_id))
+
+    conn.executemany(
+        "INSERT INTO students (roll_no, name, class_id) VALUES (?, ?, ?)",
+        new_rows
+    )
+    return len(new_rows)
+
+
+def import_students(class_id, students, status=None, on_batch=None, known_rolls=()):
+    """Dedupe streamed (roll, name) pairs and insert them in batches.
+
+    Rows whose roll number is in known_rolls (usually the cached roster)
+    are skipped up front; the check inside each write transaction still
+    stops concurrent imports from both adding the same student. on_batch
+    is called after each batch is written. Time spent pulling rows from
+    students (parse), deduping (clean) and writing (insert) is added to
+    status["timings"]. Returns (added, skipped).
+    """
+    status = status if status is not None else {}
+    status.setdefault("rows", 0)
+    status.setdefault("added", 0)
+    timings = status.setdefault("timings", dict.fromkeys(("parse", "clean", "insert"), 0.0))
+
+    seen = set()
+    batch = []
+    parsing = writing = 0.0
+    started = time.perf_counter()
+
+    def flush():
+        nonlocal writing
+        flush_started = time.perf_counter()
+        status["added"] += writer.submit(lambda conn: insert_new_students(conn, class_id, batch))
+        writing += time.perf_counter() - flush_started
+        class_summaries.invalidate(class_id)
+        roster_cache.invalidate(class_id)
+        batch.clear()
+        if on_batch:
+            on_batch()
+
+    rows = iter(students)
+    while True:
+        # Streamed sources (PDF) parse as they are pulled
+        row_started = time.perf_counter()
+        try:
+            roll, name = next(rows)
+        except StopIteration:
+            parsing += time.perf_counter() - row_started
+            break
+        parsing += time.perf_counter() - row_started
+
+        status["rows"] += 1
+        key = (roll.lower(), name.lower())
+        if key in seen or roll in known_rolls:
+            continue
+        seen.add(key)
+        batch.append((roll, name))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    timings["parse"] += parsing
+    timings["insert"] += writing
+    timings["clean"] += time.perf_counter() - started - parsing - writing
+    return status["added"], status["rows"] - status["added"]
+
+
+def read_excel_students(path):
+    """(roll, name) pairs from the detected Roll/Reg No and Name columns"""
+    df = pd.read_excel(path)
+    roll_col, name_col = detect_columns(df.columns)
+
+    if not roll_col or not name_col:
+        raise ValueError("Required columns (Roll/Reg No & Name) not found in Excel")
+
+    frame = df[[roll_col, name_col]].dropna()
+    rolls = frame[roll_col].astype(str).str.strip()
+    names = frame[name_col].astype(str).str.strip()
+
+    valid = (
+        (rolls != "") & (names != "")
+        & (rolls.str.lower() != "nan") & (names.str.lower() != "nan")
+    )
+    return list(zip(rolls[valid], names[valid]))
+
+
+def read_docx_students(path):
+    """(roll, name) pairs from Word tables, or 'Roll - Name' paragraphs"""
+    doc = docx.Document(path)
+    students_data = []
+
+    for table in doc.tables:
+        for row in table.rows[1:]:  # Skip header
+            if len(row.cells) >= 2:
+                roll = row.cells[0].text.strip()
+                name = row.cells[1].text.strip()
+
+                if roll and name and roll.lower() != "nan" and name.lower() != "nan":
+                    students_data.append((roll, name))
+
+    # Also check paragraphs for data
+    if not students_data:
+        for para in doc.paragraphs:
+            text = para.text.strip()
+            if ' - ' in text or ',' in text:
+                parts = text.replace(' - ', ',').split(',')
+                if len(parts) >= 2:
+                    roll = parts[0].strip()
+                    name = parts[1].strip()
+                    if roll and name:
+                        students_data.append((roll, name))
+
+    return students_data
+
+
+def pdf_page_count(path):
+    """Page count of a PDF; raises ValueError over PDF_MAX_PAGES"""
+    page_count = len(PyPDF2.PdfReader(path).pages)
+    if page_count > PDF_MAX_PAGES:
+        raise ValueError(f"PDF has {page_count} pages; the limit is {PDF_MAX_PAGES}")
+    return page_count
+
+
+IMPORT_EMPTY_MESSAGES = {
+    "excel": "No student data found in Excel",
+    "docx": "No student data found in Word document (use format: Roll - Name or Roll, Name)",
+    "pdf": "No student data found in PDF (use format: Roll - Name per line)",
+}
+
+
+def run_import_job(job, class_id, path, fmt):
+    """Job body for /import: parse the spooled upload and insert its students"""
+    status = {}
+    try:
+        conn = connect_db()
+        try:
+            known_rolls = get_roster(class_id, conn).by_roll
+        finally:
+            conn.close()
+
+        parse_started = time.perf_counter()
+        if fmt == "pdf":
+            pages = pdf_page_count(path)
+            students = iter_pdf_students(path, pages, status)
+            progress = lambda: status.get("pages_done", 0) / pages
+        else:
+            students = read_excel_students(path) if fmt == "excel" else read_docx_students(path)
+            total = len(students) or 1
+            progress = lambda: status["rows"] / total
+        status["timings"] = {
+            "parse": time.perf_counter() - parse_started, "clean": 0.0, "insert": 0.0
+        }
+
+        added, skipped = import_students(
+            class_id, students, status,
+            on_batch=lambda: job.progress(progress(), f"{status['added']} students added"),
+            known_rolls=known_rolls
+        )
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if not status["rows"]:
+        raise ValueError(IMPORT_EMPTY_MESSAGES[fmt])
+
+    timings = status["timings"]
+    timing = (
+        f"parse {timings['parse']:.2f}s, clean {timings['clean']:.2f}s, "
+        f"insert {timings['insert']:.2f}s"
+    )
+    app.logger.info("Imported %d students into class %s (%s)", added, class_id, timing)
+
+    message = f"Import successful! {added} students added"
+    if skipped > 0:
+        message += f" ({skipped} duplicates skipped)"
+    return {"message": message + f" [{timing}]"}
+
+
+# Exports larger than this spill from memory to an anonymous temp file
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def write_xlsx(target, title, header, rows):
+    """Stream rows (any iterable, e.g. a live cursor) into a write-only workbook"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    ws.append(header)
+    for r in rows:
+        ws.append(list(r))
+
+    wb.save(target)
+
+
+def send_xlsx(title, header, rows, download_name):
+    """Write rows to a workbook and send it as an attachment.
+
+    The workbook is written to a SpooledTemporaryFile, which send_file
+    closes once the response is sent, so nothing is left behind in the
+    temp directory.
+    """
+    buf = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    write_xlsx(buf, title, header, rows)
+    buf.seek(0)
+
+    return send_file(buf, as_attachment=True, download_name=download_name)
+
+
 app = Flask(__name__, static_folder=resource_path("static"))
 app.secret_key = "attendance_secret"
 
 
-def get_db():
-    appdata = os.path.join(os.getenv("APPDATA"), "PerfectAttendance")
-    os.makedirs(appdata, exist_ok=True)
+def resolve_db_path():
+    """Locate the database file once at startup, seeding it from the bundled copy.
+
+    ATTENDANCE_DB overrides the location; otherwise the file lives under
+    %APPDATA% (or ~/.local/share where APPDATA is unset) in PerfectAttendance/.
+    """
+    db_path = os.getenv("ATTENDANCE_DB")
+    if not db_path:
+        base = os.getenv("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        db_path = os.path.join(base, "PerfectAttendance", "database.db")
 
-    db_path = os.path.join(appdata, "database.db")
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
 
     if not os.path.exists(db_path):
         src = resource_path("database.db")
@@ -165,12 +1224,741 @@ def get_db():
         else:
             open(db_path, "w").close()
 
-    return sqlite3.connect(db_path)
+    return db_path
+
+
+DB_PATH = resolve_db_path()
+
+# How long a connection waits on another process's write lock
+DB_BUSY_TIMEOUT_MS = int(os.getenv("ATTENDANCE_BUSY_TIMEOUT_MS", "5000"))
+
+# Applied once to every new connection
+DB_PRAGMAS = [
+    # Must precede WAL to apply to an empty file; see init_db_if_needed
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB
+    "PRAGMA foreign_keys=ON",
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+]
+
+
+def connect_db(factory=sqlite3.Connection):
+    """Open a new tuned connection; callers own it and must close it"""
+    conn = sqlite3.connect(DB_PATH, factory=factory)
+    conn.executescript(";\n".join(DB_PRAGMAS))
+    return conn
+
+
+def get_db():
+    """Connection for the current app context, closed in teardown"""
+    if "db" not in g:
+        g.db = connect_db(factory=ProfiledConnection)
+    return g.db
+
+
+@app.teardown_appcontext
+def close_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+
+# ====================== INSTRUMENTATION ======================
+# Every request gets wall, SQL, template and write timings in a
+# Server-Timing header; rolling per-endpoint samples feed
+# /api/v1/metrics/requests. Set ATTENDANCE_SLOW_QUERY_MS to log slow
+# statements together with their EXPLAIN QUERY PLAN.
+SLOW_QUERY_MS = float(os.getenv("ATTENDANCE_SLOW_QUERY_MS", "0"))
+TIMING_WINDOW = 1000
+SLOW_QUERY_KEEP = 50
+
+request_samples = {}
+slow_queries = deque(maxlen=SLOW_QUERY_KEEP)
+samples_lock = threading.Lock()
+
+
+def record_sql(conn, sql, params, elapsed, many=False):
+    if has_app_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+
+    if not SLOW_QUERY_MS or elapsed * 1000 < SLOW_QUERY_MS:
+        return
+
+    plan = []
+    if not many:
+        try:
+            plan = [
+                row[-1] for row in
+                sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params)
+            ]
+        except sqlite3.Error:
+            pass
+
+    statement = " ".join(sql.split())
+    slow_queries.append({
+        "ms": round(elapsed * 1000, 3),
+        "sql": statement,
+        "plan": plan,
+        "endpoint": request.endpoint if has_request_context() else None,
+    })
+    app.logger.warning(
+        "Slow query (%.1f ms): %s | plan: %s",
+        elapsed * 1000, statement, "; ".join(plan) or "-"
+    )
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports statement count and time to the current request.
+
+    Only execute() is timed: rows fetched later while iterating a cursor
+    are not included.
+    """
+
+    def execute(self, sql, params=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            record_sql(self.connection, sql, params, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            record_sql(self.connection, sql, None, time.perf_counter() - started, many=True)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements all go through ProfiledCursor"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def note_write_time(elapsed):
+    """Time a request spent waiting on the writer thread"""
+    if has_app_context() and "write_time" in g:
+        g.write_time += elapsed
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.template_time = 0.0
+    g.write_time = 0.0
+
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def stop_template_timer(sender, template, context, **extra):
+    started = g.pop("template_started", None)
+    if started is not None and "template_time" in g:
+        g.template_time += time.perf_counter() - started
+
+
+@app.after_request
+def add_server_timing(response):
+    if "request_started" not in g:
+        return response
+
+    total = time.perf_counter() - g.request_started
+    response.headers.add(
+        "Server-Timing",
+        f'app;dur={total * 1000:.2f}, '
+        f'sql;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries", '
+        f'tpl;dur={g.template_time * 1000:.2f}, '
+        f'write;dur={g.write_time * 1000:.2f}'
+    )
+
+    key = request.url_rule.rule if request.url_rule else "<unmatched>"
+    sample = (total, g.sql_time, g.sql_count, g.template_time)
+    with samples_lock:
+        request_samples.setdefault(key, deque(maxlen=TIMING_WINDOW)).append(sample)
+    return response
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def request_timing_summary():
+    with samples_lock:
+        snapshot = {key: list(samples) for key, samples in request_samples.items()}
+
+    summary = {}
+    for key, samples in sorted(snapshot.items()):
+        totals = sorted(s[0] * 1000 for s in samples)
+        sql = sorted(s[1] * 1000 for s in samples)
+        templates = sorted(s[3] * 1000 for s in samples)
+        summary[key] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(totals, 50), 3),
+            "p90_ms": round(percentile(totals, 90), 3),
+            "p99_ms": round(percentile(totals, 99), 3),
+            "max_ms": round(totals[-1], 3),
+            "sql_p50_ms": round(percentile(sql, 50), 3),
+            "sql_p90_ms": round(percentile(sql, 90), 3),
+            "avg_queries": round(sum(s[2] for s in samples) / len(samples), 2),
+            "template_p50_ms": round(percentile(templates, 50), 3),
+        }
+    return summary
+
+
+# ====================== WRITE COORDINATOR ======================
+WRITE_BATCH_SIZE = 32
+WRITE_TIMEOUT = float(os.getenv("ATTENDANCE_WRITE_TIMEOUT", "15"))
+WRITE_LOCK_RETRIES = 3
+
+
+class WriteTimeout(Exception):
+    """A queued write did not start within its time limit"""
+
+
+class WriteCoordinator:
+    """Single writer thread that applies every mutation in this process.
+
+    Routes pass a function taking a connection. Jobs that queue up together
+    share one BEGIN IMMEDIATE transaction, each under its own SAVEPOINT so a
+    failing job is rolled back alone. Jobs must not commit themselves. Reads
+    keep using get_db() and stay concurrent under WAL; busy_timeout and the
+    lock retries cover other worker processes holding the write lock.
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {
+            "jobs": 0,
+            "batches": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "lock_retries": 0,
+            "max_queue_depth": 0,
+            "lock_wait_total": 0.0,
+            "lock_wait_max": 0.0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+        }
+
+    def _ensure_started(self):
+        # Started lazily so every forked worker gets its own thread, and
+        # started again should the thread ever die
+        with self._lock:
+            forked = self._pid != os.getpid()
+            if self._thread is not None and not forked and self._thread.is_alive():
+                return
+            if forked:
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="db-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, fn, timeout=WRITE_TIMEOUT):
+        """Run fn(conn) on the writer thread and return its result"""
+        self._ensure_started()
+        future = Future()
+        submitted = time.perf_counter()
+        self._queue.put((fn, future, submitted))
+
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise WriteTimeout(f"write not started after {timeout:g}s")
+            # Already running; give it one more timeout before giving up
+            try:
+                return future.result(timeout)
+            except FutureTimeout:
+                raise WriteTimeout(
+                    f"write still running after {2 * timeout:g}s, it may yet be applied"
+                ) from None
+        finally:
+            note_write_time(time.perf_counter() - submitted)
+
+    def _run(self):
+        conn = attach_archive(connect_db())
+        conn.isolation_level = None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [job for job in batch if job[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._apply(conn, batch)
+            except Exception as e:
+                # Never let the writer thread die with callers waiting on it
+                app.logger.exception("Write batch failed")
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _apply(self, conn, batch):
+        started = time.perf_counter()
+        for attempt in range(WRITE_LOCK_RETRIES + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                if attempt == WRITE_LOCK_RETRIES:
+                    self._finish(
+                        batch, started, time.perf_counter(), [(None, e)] * len(batch)
+                    )
+                    return
+                with self._lock:
+                    self._stats["lock_retries"] += 1
+                time.sleep(0.05 * 2 ** attempt)
+        locked = time.perf_counter()
+
+        outcomes = []
+        aborted = None
+        for fn, _, _ in batch:
+            conn.execute("SAVEPOINT job")
+            try:
+                outcomes.append((fn(conn), None))
+            except Exception as e:
+                outcomes.append((None, e))
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO job")
+            if not conn.in_transaction:
+                # SQLite rolled back the whole transaction (I/O error, full
+                # disk, interrupt), taking the earlier jobs with it
+                aborted = outcomes[-1][1] or sqlite3.OperationalError(
+                    "transaction rolled back during the write"
+                )
+                break
+            conn.execute("RELEASE job")
+
+        if aborted is not None:
+            outcomes = [(None, aborted)] * len(batch)
+        else:
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                outcomes = [(None, e)] * len(batch)
+
+        self._finish(batch, started, locked, outcomes)
+
+    def _finish(self, batch, started, locked, outcomes):
+        lock_wait = locked - started
+        queue_wait = max(started - queued_at for _, _, queued_at in batch)
+        errors = sum(1 for _, error in outcomes if error is not None)
+
+        with self._lock:
+            stats = self._stats
+            stats["jobs"] += len(batch)
+            stats["batches"] += 1
+            stats["errors"] += errors
+            stats["lock_wait_total"] += lock_wait
+            stats["lock_wait_max"] = max(stats["lock_wait_max"], lock_wait)
+            stats["queue_wait_total"] += queue_wait
+            stats["queue_wait_max"] = max(stats["queue_wait_max"], queue_wait)
+
+        for (_, future, _), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": stats["max_queue_depth"],
+            "jobs": stats["jobs"],
+            "batches": stats["batches"],
+            "avg_batch_size": round(stats["jobs"] / batches, 2),
+            "errors": stats["errors"],
+            "timeouts": stats["timeouts"],
+            "lock_retries": stats["lock_retries"],
+            "lock_wait_ms": {
+                "avg": round(stats["lock_wait_total"] / batches * 1000, 3),
+                "max": round(stats["lock_wait_max"] * 1000, 3),
+            },
+            "queue_wait_ms": {
+                "avg": round(stats["queue_wait_total"] / batches * 1000, 3),
+                "max": round(stats["queue_wait_max"] * 1000, 3),
+            },
+        }
+
+
+writer = WriteCoordinator()
+
+# Free pages left behind by large deletes are handed back in small steps
+VACUUM_AFTER_DELETE = os.getenv("ATTENDANCE_VACUUM_AFTER_DELETE", "1") == "1"
+VACUUM_STEP_PAGES = 256
+AUTO_COMPACT_MAX_PAGES = 1024
+
+
+def reclaim_free_pages(step=VACUUM_STEP_PAGES):
+    """Shrink the file by running incremental_vacuum one step at a time.
+
+    Each step is a short writer job, so saves interleave with it and WAL
+    readers are never blocked. Does nothing unless the database uses
+    auto_vacuum=INCREMENTAL (see `flask compact-db`). Returns the number
+    of pages released.
+    """
+    def vacuum_step(conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0, 0
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # sqlite3 steps a statement without result columns only once,
+        # and each step of incremental_vacuum frees one page
+        for _ in range(min(step, before)):
+            conn.execute("PRAGMA incremental_vacuum")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after, after
+
+    released = 0
+    while True:
+        try:
+            freed, remaining = writer.submit(vacuum_step)
+        except (WriteTimeout, sqlite3.Error):
+            return released
+        released += freed
+        if not freed or not remaining:
+            return released
+
+
+# ====================== BACKGROUND JOBS ======================
+# Imports and large exports run on a local thread pool. Job state lives in
+# the jobs table so any worker process can answer status polls and serve
+# the output file; outputs are deleted JOB_OUTPUT_TTL seconds after the job
+# finishes.
+JOB_WORKERS = 2
+JOB_OUTPUT_TTL = float(os.getenv("ATTENDANCE_JOB_TTL", "3600"))
+JOB_PROGRESS_INTERVAL = 0.5
+JOB_EXPORT_MIN_ROWS = int(os.getenv("ATTENDANCE_JOB_EXPORT_ROWS", "20000"))
+JOB_OUTPUT_DIR = os.path.join(os.path.dirname(DB_PATH), "job-output")
+JOB_FIELDS = ["id", "kind", "class_id", "state", "progress", "message",
+              "output_path", "output_name", "created", "started", "finished", "expires"]
+
+_job_pool = None
+_job_pool_lock = threading.Lock()
+
+
+def get_job_pool():
+    global _job_pool
+    with _job_pool_lock:
+        if _job_pool is None:
+            _job_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        return _job_pool
+
+
+class JobContext:
+    """Handed to a job function to report progress and place its output"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self._reported = 0.0
+
+    def progress(self, fraction, message=None):
+        # Throttled so a chatty job does not flood the writer queue
+        now = time.monotonic()
+        if now - self._reported < JOB_PROGRESS_INTERVAL:
+            return
+        self._reported = now
+        writer.submit(lambda conn: conn.execute(
+            "UPDATE jobs SET progress=?, message=COALESCE(?, message) WHERE id=?",
+            (round(min(fraction, 1.0), 4), message, self.id)
+        ))
+
+    def output_path(self, suffix):
+        os.makedirs(JOB_OUTPUT_DIR, exist_ok=True)
+        return os.path.join(JOB_OUTPUT_DIR, self.id + suffix)
+
+
+def enqueue_job(kind, class_id, fn, *args):
+    """Record a job and run fn(job, *args) in the background; returns its id.
+
+    fn may return {"message": ..., "output": (path, download_name)}.
+    """
+    purge_expired_jobs()
+
+    job_id = uuid.uuid4().hex
+    writer.submit(lambda conn: conn.execute(
+        "INSERT INTO jobs (id, kind, class_id, created) VALUES (?, ?, ?, ?)",
+        (job_id, kind, class_id, time.time())
+    ))
+    get_job_pool().submit(_run_job, job_id, fn, args)
+    return job_id
+
+
+def _run_job(job_id, fn, args):
+    writer.submit(lambda conn: conn.execute(
+        "UPDATE jobs SET state='running', started=? WHERE id=?", (time.time(), job_id)
+    ))
+
+    try:
+        result = fn(JobContext(job_id), *args) or {}
+        state, message = "done", result.get("message")
+    except Exception as e:
+        app.logger.exception("Job %s failed", job_id)
+        result, state, message = {}, "failed", str(e)
+
+    output_path, output_name = result.get("output") or (None, None)
+    finished = time.time()
+    try:
+        writer.submit(lambda conn: conn.execute("""
+            UPDATE jobs
+            SET state=?, progress=CASE WHEN ?='done' THEN 1 ELSE progress END,
+                message=?, output_path=?, output_name=?, finished=?, expires=?
+            WHERE id=?
+        """, (state, state, message, output_path, output_name,
+              finished, finished + JOB_OUTPUT_TTL, job_id)))
+    except (WriteTimeout, sqlite3.Error):
+        app.logger.exception("Could not record the result of job %s", job_id)
+
+
+def get_job(job_id, db):
+    """The job's row as a dict, or None if unknown or past its expiry.
+
+    Expired rows are only purged when the next job is enqueued, so they
+    are filtered here to keep their outputs from being served.
+    """
+    row = db.execute(
+        f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id=?", (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    job = dict(zip(JOB_FIELDS, row))
+    if job["expires"] is not None and job["expires"] < time.time():
+        return None
+    return job
+
+
+def purge_expired_jobs():
+    """Drop expired job rows and delete their output files"""
+    now = time.time()
+
+    def purge(conn):
+        paths = [
+            path for (path,) in conn.execute(
+                "SELECT output_path FROM jobs WHERE expires < ?", (now,)
+            ) if path
+        ]
+        conn.execute("DELETE FROM jobs WHERE expires < ?", (now,))
+        return paths
+
+    for path in writer.submit(purge):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def fail_interrupted_jobs():
+    """Mark jobs left queued or running by a previous server run as failed"""
+    now = time.time()
+    conn = connect_db()
+    with conn:
+        conn.execute("""
+            UPDATE jobs SET state='failed', message='Interrupted by a restart',
+                            finished=?, expires=?
+            WHERE state IN ('queued', 'running')
+        """, (now, now + JOB_OUTPUT_TTL))
+    conn.close()
+
+
+# ====================== ARCHIVE ======================
+# Closed terms are moved out of the live attendance table into a separate
+# SQLite file, so day-to-day pages, stats triggers and indexes only deal
+# with the current term. The writer keeps the file attached as "archive";
+# reports attach it on demand when asked to include the archive.
+ARCHIVE_PATH = os.getenv("ATTENDANCE_ARCHIVE_DB") or os.path.join(
+    os.path.dirname(DB_PATH), "archive.db"
+)
+ARCHIVE_DATES_PER_BATCH = 20
+
+ARCHIVE_SCHEMA_SQL = """
+    PRAGMA archive.journal_mode=WAL;
+    PRAGMA archive.synchronous=NORMAL;
+
+    CREATE TABLE IF NOT EXISTS archive.attendance (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        status TEXT,
+        od_reason TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_attendance_student_date
+        ON attendance(student_id, date);
+    CREATE INDEX IF NOT EXISTS archive.idx_attendance_date_student
+        ON attendance(date, student_id);
+
+    CREATE TABLE IF NOT EXISTS archive.class_dates (
+        class_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        PRIMARY KEY (class_id, date)
+    ) WITHOUT ROWID;
+
+    CREATE TEMP VIEW IF NOT EXISTS attendance_all AS
+        SELECT id, student_id, date, status, od_reason FROM main.attendance
+        UNION ALL
+        SELECT id, student_id, date, status, od_reason FROM archive.attendance;
+"""
+
+
+def attach_archive(conn):
+    """Attach the archive file (created on first use) and the attendance_all view"""
+    if not any(name == "archive" for _, name, _ in conn.execute("PRAGMA database_list")):
+        conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_PATH,))
+        conn.executescript(ARCHIVE_SCHEMA_SQL)
+    return conn
+
+
+def get_archive_cutoff(db):
+    """Dates before this are archived and read-only; None if nothing is"""
+    return db.execute("SELECT MAX(cutoff) FROM archived_terms").fetchone()[0]
+
+
+def report_source(db, include_archive):
+    """Attendance table for a report: the current term, or every term"""
+    if include_archive:
+        attach_archive(db)
+        return "attendance_all"
+    return "attendance"
+
+
+def archive_toggle_url(db, include_archive):
+    """The current page with include-archive flipped, or None with no archive"""
+    if not get_archive_cutoff(db):
+        return None
+    args = request.args.to_dict()
+    if include_archive:
+        args.pop("archive", None)
+    else:
+        args["archive"] = "1"
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def archive_attendance(cutoff, progress=None):
+    """Move attendance and session dates older than cutoff into the archive.
+
+    The cutoff is recorded first so saves for those dates are refused from
+    then on. Rows move a few dates at a time, so saves keep flowing in
+    between. A commit across two WAL files is only atomic per file, so each
+    step copies into the archive and commits, then deletes from the live
+    table only the rows the archive now holds; running it again finishes
+    an interrupted move. Returns the number of rows moved.
+    """
+    def start(conn):
+        conn.execute(
+            "INSERT OR IGNORE INTO archived_terms (cutoff, archived_at) VALUES (?, ?)",
+            (cutoff, time.time())
+        )
+        return [d for (d,) in conn.execute(
+            "SELECT DISTINCT date FROM main.attendance WHERE date < ? ORDER BY date",
+            (cutoff,)
+        )]
+
+    def move(dates):
+        marks = ", ".join("?" * len(dates))
+
+        def copy(conn):
+            conn.execute(f"""
+                INSERT OR REPLACE INTO archive.attendance (id, student_id, date, status, od_reason)
+                SELECT id, student_id, date, status, od_reason
+                FROM main.attendance WHERE date IN ({marks})
+            """, dates)
+
+        def delete(conn):
+            return conn.execute(f"""
+                DELETE FROM main.attendance
+                WHERE date IN ({marks})
+                  AND id IN (SELECT id FROM archive.attendance WHERE date IN ({marks}))
+            """, dates + dates).rowcount
+
+        writer.submit(copy)
+        return writer.submit(delete)
+
+    def copy_dates(conn):
+        conn.execute("""
+            INSERT OR IGNORE INTO archive.class_dates (class_id, date)
+            SELECT class_id, date FROM main.class_dates WHERE date < ?
+        """, (cutoff,))
+
+    def finish(conn):
+        conn.execute("""
+            DELETE FROM main.class_dates
+            WHERE date < ? AND (class_id, date) IN (
+                SELECT class_id, date FROM archive.class_dates WHERE date < ?
+            )
+        """, (cutoff, cutoff))
+        conn.execute(
+            "UPDATE archived_terms SET rows = rows + ?, archived_at = ? WHERE cutoff = ?",
+            (moved, time.time(), cutoff)
+        )
+        return [cid for (cid,) in conn.execute("SELECT id FROM classes")]
+
+    dates = writer.submit(start)
+    moved = 0
+    for i in range(0, len(dates), ARCHIVE_DATES_PER_BATCH):
+        moved += move(dates[i:i + ARCHIVE_DATES_PER_BATCH])
+        if progress:
+            progress(min(i + ARCHIVE_DATES_PER_BATCH, len(dates)) / len(dates),
+                     f"{moved} records archived")
+
+    writer.submit(copy_dates)
+    class_summaries.invalidate(*writer.submit(finish))
+    reclaim_free_pages()
+    return moved
+
+
+def run_archive_job(job, cutoff):
+    moved = archive_attendance(cutoff, job.progress)
+    return {"message": f"Archived {moved} records dated before {cutoff}"}
 
 
 # ====================== PREMIUM STYLES & SCRIPTS ======================
+# Served once as /styles.css and cached by the browser
 BASE_STYLES = """
-<style>
     * {
         margin: 0;
         padding: 0;
@@ -1022,13 +2810,63 @@ BASE_STYLES = """
     }
 }
 
+"""
 
+STYLES_ETAG = hashlib.sha1(BASE_STYLES.encode("utf-8")).hexdigest()[:16]
+STYLES_LINK = '<link rel="stylesheet" href="/styles.css?v={{ styles_version }}">'
 
-</style>
+# Polls the background job named by a #jobStatus box on the page
+JOB_STATUS_SCRIPT = """
+        <script>
+            const jobBox = document.getElementById('jobStatus');
+            if (jobBox) {
+                const pollJob = () => fetch('/jobs/' + jobBox.dataset.job)
+                    .then(r => r.json())
+                    .then(job => {
+                        if (job.state === 'done') {
+                            jobBox.textContent = '✅ ' + (job.message || 'Done') + ' ';
+                            if (job.download) {
+                                const link = document.createElement('a');
+                                link.href = job.download;
+                                link.textContent = '📥 Download';
+                                jobBox.appendChild(link);
+                            } else {
+                                const url = new URL(location.href);
+                                url.searchParams.delete('job');
+                                setTimeout(() => location.replace(url), 1500);
+                            }
+                        } else if (job.state === 'failed' || job.error) {
+                            jobBox.className = 'flash-message flash-warning';
+                            jobBox.textContent = '❌ ' + (job.message || job.error);
+                        } else {
+                            jobBox.textContent = '⏳ ' + (job.message || 'Working...') +
+                                ' (' + Math.round(job.progress * 100) + '%)';
+                            setTimeout(pollJob, 1000);
+                        }
+                    });
+                pollJob();
+            }
+        </script>
 """
 
 # ====================== ROUTES ======================
 
+@app.route("/styles.css")
+def base_styles():
+    response = make_response(BASE_STYLES)
+    response.mimetype = "text/css"
+    response.set_etag(STYLES_ETAG)
+    response.cache_control.public = True
+    response.cache_control.max_age = 30 * 24 * 3600
+    return response.make_conditional(request)
+
+
+@app.context_processor
+def inject_styles_version():
+    return {"styles_version": STYLES_ETAG}
+
+
+
 @app.route("/admin_logout")
 def admin_logout():
     session.pop("admin", None)
@@ -1040,10 +2878,11 @@ def admin_reset():
         flash("❌ Admin access required", "warning")
         return redirect("/")
 
-    db = get_db()
-    db.execute("DELETE FROM admin")
-    db.commit()
-    db.close()
+    try:
+        writer.submit(lambda conn: conn.execute("DELETE FROM admin"))
+    except (WriteTimeout, sqlite3.Error) as e:
+        flash(f"❌ Could not reset password: {e}", "warning")
+        return redirect("/")
 
     session.pop("admin", None)
 
@@ -1051,6 +2890,32 @@ def admin_reset():
     return redirect("/")
 
 
+@app.route("/admin_archive", methods=["POST"])
+def admin_archive():
+    if not session.get("admin"):
+        flash("❌ Admin access required", "warning")
+        return redirect("/")
+
+    try:
+        cutoff = date.fromisoformat(request.form.get("cutoff", "")).isoformat()
+    except ValueError:
+        flash("❌ Please pick a valid date", "warning")
+        return redirect("/")
+
+    if cutoff > date.today().isoformat():
+        flash("❌ Only past terms can be archived", "warning")
+        return redirect("/")
+
+    previous = get_archive_cutoff(get_db())
+    # The same cutoff again is allowed: it finishes an interrupted move
+    if previous and cutoff < previous:
+        flash(f"⚠️ Everything before {previous} is already archived", "warning")
+        return redirect("/")
+
+    job_id = enqueue_job("archive", None, run_archive_job, cutoff)
+    return redirect(f"/?job={job_id}")
+
+
 @app.route("/admin_unlock", methods=["POST"])
 def admin_unlock():
     password = request.form.get("password")
@@ -1074,9 +2939,13 @@ def admin_unlock():
             return redirect("/")
 
         hashed = generate_password_hash(password)
-        db.execute("INSERT INTO admin (password) VALUES (?)", (hashed,))
-        db.commit()
-        db.close()
+        try:
+            writer.submit(lambda conn: conn.execute(
+                "INSERT INTO admin (password) VALUES (?)", (hashed,)
+            ))
+        except (WriteTimeout, sqlite3.Error) as e:
+            flash(f"❌ Could not save password: {e}", "warning")
+            return redirect("/")
 
         session["admin"] = True
         flash("✅ Admin password set successfully!", "success")
@@ -1086,60 +2955,16 @@ def admin_unlock():
     stored_hash = existing[0]
 
     if not check_password_hash(stored_hash, password):
-        db.close()
         flash("❌ Incorrect admin password", "warning")
         return redirect("/")
 
-    db.close()
     session["admin"] = True
     flash("🔐 Admin login successful", "success")
     return redirect("/")
 
 
 
-@app.route("/")
-def dashboard():
-    db = get_db()
-    admin_exists = bool(
-    db.execute("SELECT password FROM admin").fetchone()
-)
-
-    classes_db = db.execute("SELECT id, class_name FROM classes").fetchall()
-
-    class_stats = []
-    for cid, cname in classes_db:
-        students = db.execute("SELECT id FROM students WHERE class_id=?", (cid,)).fetchall()
-        total_students = len(students)
-
-        safe = warning = defaulters = 0
-        total_percent = 0
-
-        for (sid,) in students:
-            stats = get_student_attendance_stats(sid, db)
-            total_percent += stats["percent"]
-
-            if stats["status"] == "Safe":
-                safe += 1
-            elif stats["status"] == "Warning":
-                warning += 1
-            else:
-                defaulters += 1
-
-        avg_percent = round(total_percent / total_students, 2) if total_students else 0
-
-        class_stats.append({
-            "id": cid,
-            "name": cname,
-            "total_students": total_students,
-            "safe": safe,
-            "warning": warning,
-            "defaulters": defaulters,
-            "avg_percent": avg_percent
-        })
-
-    db.close()
-
-    html = """
+DASHBOARD_TEMPLATE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -1147,7 +2972,7 @@ def dashboard():
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Attendance Monitor - Dashboard</title>
         <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        """ + BASE_STYLES + """
+        """ + STYLES_LINK + """
     </head>
     <body>
         <div class="container">
@@ -1202,6 +3027,10 @@ def dashboard():
                 {% endif %}
             {% endwith %}
 
+            {% if job_id and session.get('admin') %}
+                <div class="flash-message flash-success" id="jobStatus" data-job="{{ job_id }}">⏳ Working...</div>
+            {% endif %}
+
             <div class="add-class-form">
                 <h2>➕ Add New Class</h2>
                 <form method="POST" action="/add_class">
@@ -1290,6 +3119,20 @@ def dashboard():
             </button>
         </form>
     </div>
+
+    <form method="POST" action="/admin_archive"
+          style="display:flex; gap:15px; flex-wrap:wrap; align-items:end; margin-top:20px;"
+          onsubmit="return confirm('🗄️ Records before this date will move to the archive and become read-only. Continue?');">
+        <div>
+            <label style="font-weight:700;">🗄️ Archive attendance before</label><br>
+            <input type="date" name="cutoff" required
+                   style="padding:10px 14px; border-radius:10px; border:2px solid #ddd;">
+        </div>
+        <button type="submit" class="btn btn-secondary">Archive Closed Terms</button>
+        {% if archive_cutoff %}
+            <small>Archived so far: everything before {{ archive_cutoff }}</small>
+        {% endif %}
+    </form>
 </div>
 {% endif %}
 
@@ -1356,6 +3199,7 @@ def dashboard():
                 }
             });
         </script>
+        """ + JOB_STATUS_SCRIPT + """
         <script>
     const classStats = {{ classes | tojson }};
 
@@ -1404,11 +3248,30 @@ def dashboard():
     </html>
     """
 
-    return render_template_string(
-    html,
+
+@app.route("/")
+def dashboard():
+    db = get_db()
+    admin_exists = bool(
+    db.execute("SELECT password FROM admin").fetchone()
+)
+
+    classes_db = db.execute("SELECT id, class_name FROM classes").fetchall()
+
+    summaries = get_class_summaries([cid for cid, _ in classes_db], db)
+
+    class_stats = [
+        dict(summaries[cid], id=cid, name=cname)
+        for cid, cname in classes_db
+    ]
+
+    return render_template(
+    "dashboard.html",
     classes=class_stats,
     session=session,
     admin_exists=admin_exists,
+    job_id=request.args.get("job"),
+    archive_cutoff=get_archive_cutoff(db),
     get_flashed_messages=get_flashed_messages
 )
 
@@ -1430,12 +3293,12 @@ def add_class():
         existing = c.execute("SELECT id FROM classes WHERE class_name=?", (name,)).fetchone()
         if existing:
             flash(f"⚠️ Class '{name}' already exists!", "warning")
-            db.close()
             return redirect("/")
         
         # Insert the class
-        c.execute("INSERT INTO classes (class_name) VALUES (?)", (name,))
-        db.commit()
+        writer.submit(lambda conn: conn.execute(
+            "INSERT INTO classes (class_name) VALUES (?)", (name,)
+        ))
         
         # Verify it was inserted
         verify = c.execute("SELECT id FROM classes WHERE class_name=?", (name,)).fetchone()
@@ -1445,71 +3308,23 @@ def add_class():
         else:
             flash(f"❌ Failed to create class '{name}'", "warning")
         
-        db.close()
     except Exception as e:
         flash(f"❌ Error creating class: {str(e)}", "warning")
     
     return redirect("/")
 
 
-@app.route("/attendance/<int:class_id>")
-def attendance(class_id):
-    db = get_db()
-    today = date.today().isoformat()
-
-    selected_date = request.args.get("date", today)
-
-    dates_raw = db.execute("""
-        SELECT DISTINCT date FROM attendance
-        WHERE student_id IN (
-            SELECT id FROM students WHERE class_id=?
-        )
-    """, (class_id,)).fetchall()
+# Students per page on the mark-attendance form
+ROSTER_PAGE_SIZE = 100
 
-    dates = [d[0] for d in dates_raw]
-
-    if today not in dates:
-        dates.append(today)
-
-    dates.sort(reverse=True)
-
-    students = db.execute("""
-        SELECT * FROM students
-        WHERE class_id=?
-        ORDER BY roll_no
-    """, (class_id,)).fetchall()
-
-    # Get class name
-    class_name = db.execute("SELECT class_name FROM classes WHERE id=?", (class_id,)).fetchone()[0]
-
-    attendance_data = db.execute("""
-        SELECT student_id, status, od_reason
-        FROM attendance
-        WHERE date=?
-    """, (selected_date,)).fetchall()
-
-    percent_map = {}
-    status_map = {}
-
-    if session.get("admin"):
-        for s in students:
-            sid = s[0]
-            stats = get_student_attendance_stats(sid, db)
-            percent_map[sid] = stats["percent"]
-            status_map[sid] = stats
-
-    db.close()
-
-    attendance_dict = {str(a[0]): a for a in attendance_data}
-
-    html = """
+ATTENDANCE_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Mark Attendance</title>
-        """ + BASE_STYLES + """
+        """ + STYLES_LINK + """
     </head>
     <body>
         <div class="container">
@@ -1528,6 +3343,10 @@ def attendance(class_id):
                 {% endif %}
             {% endwith %}
 
+            {% if job_id and session.get('admin') %}
+                <div class="flash-message flash-success" id="jobStatus" data-job="{{ job_id }}">⏳ Working...</div>
+            {% endif %}
+
             {% if session.get('admin') %}
                 <div class="import-section">
                     <h3>📥 Import Students from File</h3>
@@ -1581,7 +3400,7 @@ def attendance(class_id):
                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                        color: white;
                        box-shadow: 0 8px 25px rgba(102,126,234,0.5);
-                   {% elif d in attendance_dict.values()|map(attribute=0)|list %}
+                   {% elif d in saved_dates %}
                        background: #f0f4ff;
                        color: #667eea;
                        border: 2px solid #667eea;
@@ -1633,6 +3452,14 @@ def attendance(class_id):
                    required>
         </div>
 
+        {% if archive_cutoff %}
+        <div>
+            <label style="font-weight:700;">
+                <input type="checkbox" name="archive" value="1"> 🗄️ Include archive
+            </label>
+        </div>
+        {% endif %}
+
         <div>
             <button type="submit" class="btn btn-primary">
                 📥 Export Excel
@@ -1657,11 +3484,22 @@ def attendance(class_id):
                     {% endfor %}
                 </select>
                 <span class="date-label">{{ selected_date }}</span>
+                {% if pages > 1 %}
+                    <span style="margin-left: auto; display: flex; gap: 8px; align-items: center; flex-wrap: wrap;">
+                        <strong style="color: #667eea;">Page {{ page }} of {{ pages }} ({{ total_students }} students)</strong>
+                        {% for p in range(1, pages + 1) %}
+                            <a href="/attendance/{{ class_id }}?date={{ selected_date }}&page={{ p }}"
+                               class="btn {{ 'btn-primary' if p == page else 'btn-secondary' }}"
+                               style="padding: 6px 12px;">{{ p }}</a>
+                        {% endfor %}
+                    </span>
+                {% endif %}
             </div>
 
             <form method="POST" action="/save_attendance" class="attendance-form">
                 <input type="hidden" name="class_id" value="{{ class_id }}">
                 <input type="hidden" name="selected_date" value="{{ selected_date }}">
+                <input type="hidden" name="page" value="{{ page }}">
 
                 <table class="attendance-table">
                     <thead>
@@ -1678,7 +3516,10 @@ def attendance(class_id):
                             {% set sid = student[0] %}
                             {% set att = attendance_dict.get(sid|string) %}
                             <tr>
-                                <td><strong style="font-size: 1.1em;">{{ student[1] }}</strong></td>
+                                <td>
+                                    <input type="hidden" name="student_ids" value="{{ sid }}">
+                                    <strong style="font-size: 1.1em;">{{ student[1] }}</strong>
+                                </td>
                                 <td style="font-weight: 600;">
     {{ student[2] }}
     {% if session.get('admin') %}
@@ -1769,21 +3610,73 @@ def attendance(class_id):
                 }
             }
         </script>
+        """ + JOB_STATUS_SCRIPT + """
         
 
     </body>
     </html>
     """
 
-    return render_template_string(html, 
+
+@app.route("/attendance/<int:class_id>")
+def attendance(class_id):
+    db = get_db()
+    today = date.today().isoformat()
+
+    selected_date = request.args.get("date", today)
+
+    dates = [d for (d,) in db.execute(
+        "SELECT date FROM class_dates WHERE class_id=?", (class_id,)
+    )]
+    saved_dates = set(dates)
+
+    if today not in dates:
+        dates.append(today)
+
+    dates.sort(reverse=True)
+
+    total_students = len(get_roster(class_id, db).ids)
+    pages = max((total_students + ROSTER_PAGE_SIZE - 1) // ROSTER_PAGE_SIZE, 1)
+    page = min(max(request.args.get("page", 1, type=int), 1), pages)
+
+    # One page of the roster with the selected day's marks
+    rows = get_roster_for_date(
+        class_id, selected_date, db,
+        limit=ROSTER_PAGE_SIZE, offset=(page - 1) * ROSTER_PAGE_SIZE
+    )
+
+    students = [r[:4] for r in rows]
+    attendance_data = [(r[0], r[4], r[5]) for r in rows if r[4] is not None]
+
+    # Get class name
+    class_name = db.execute("SELECT class_name FROM classes WHERE id=?", (class_id,)).fetchone()[0]
+
+    percent_map = {}
+    status_map = {}
+
+    if session.get("admin"):
+        for stats in get_class_attendance_stats(class_id, db):
+            percent_map[stats["id"]] = stats["percent"]
+            status_map[stats["id"]] = stats
+
+
+    attendance_dict = {str(a[0]): a for a in attendance_data}
+
+    return render_template("attendance.html", 
                                  class_id=class_id, 
                                  class_name=class_name,
                                  dates=dates, 
+                                 saved_dates=saved_dates,
                                  selected_date=selected_date,
                                  students=students,
+                                 page=page,
+                                 pages=pages,
+                                 total_students=total_students,
                                  attendance_dict=attendance_dict,
                                  percent_map=percent_map,
                                  status_map=status_map,
+                                 job_id=request.args.get("job"),
+                                 archive_cutoff=get_archive_cutoff(db),
                                  session=session,
                                  get_flashed_messages=get_flashed_messages)
 
@@ -1794,42 +3687,74 @@ def export_range_excel(class_id):
 
     start = request.form.get("start")
     end = request.form.get("end")
+    include_archive = request.form.get("archive") == "1"
 
     if not start or not end:
         flash("❌ Please select both From and To dates", "warning")
         return redirect(f"/attendance/{class_id}")
 
     db = get_db()
-    rows = db.execute("""
-        SELECT s.roll_no, s.name, a.date, a.status, a.od_reason
-        FROM attendance a
+    source = report_source(db, include_archive)
+    records = db.execute(f"""
+        SELECT COUNT(*)
+        FROM {source} a
         JOIN students s ON a.student_id = s.id
         WHERE s.class_id=? AND a.date BETWEEN ? AND ?
-        ORDER BY a.date, s.roll_no
-    """, (class_id, start, end)).fetchall()
+    """, (class_id, start, end)).fetchone()[0]
 
-    db.close()
-
-    if not rows:
+    if not records:
         flash("⚠️ No attendance records found in selected range", "warning")
         return redirect(f"/attendance/{class_id}")
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Attendance Range Report"
+    if records >= JOB_EXPORT_MIN_ROWS:
+        job_id = enqueue_job(
+            "export", class_id, run_range_export_job,
+            class_id, start, end, records, include_archive
+        )
+        return redirect(f"/attendance/{class_id}?job={job_id}")
 
-    ws.append(["Roll No", "Name", "Date", "Status", "OD Reason"])
-    for r in rows:
-        ws.append(r)
+    return send_xlsx(
+        "Attendance Range Report",
+        RANGE_EXPORT_HEADER,
+        range_export_rows(db, class_id, start, end, source),
+        f"Attendance_{start}_to_{end}.xlsx"
+    )
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-    wb.save(tmp.name)
 
-    return send_file(
-        tmp.name,
-        as_attachment=True,
-        download_name=f"Attendance_{start}_to_{end}.xlsx"
-    )
+RANGE_EXPORT_HEADER = ["Roll No", "Name", "Date", "Status", "OD Reason"]
+
+
+def range_export_rows(db, class_id, start, end, source="attendance"):
+    """Live cursor over a range export's rows, streamed straight into the workbook"""
+    return db.execute(f"""
+        SELECT s.roll_no, s.name, a.date, a.status, a.od_reason
+        FROM {source} a
+        JOIN students s ON a.student_id = s.id
+        WHERE s.class_id=? AND a.date BETWEEN ? AND ?
+        ORDER BY a.date, s.roll_no
+    """, (class_id, start, end))
+
+
+def run_range_export_job(job, class_id, start, end, records, include_archive=False):
+    """Job body for large range exports: write the workbook to the job output store"""
+    conn = connect_db()
+
+    def rows():
+        source = report_source(conn, include_archive)
+        for i, row in enumerate(range_export_rows(conn, class_id, start, end, source), 1):
+            if i % 1000 == 0:
+                job.progress(i / records, f"{i} of {records} records written")
+            yield row
+
+    path = job.output_path(".xlsx")
+    try:
+        write_xlsx(path, "Attendance Range Report", RANGE_EXPORT_HEADER, rows())
+    finally:
+        conn.close()
+    return {
+        "message": f"Export ready ({records} records)",
+        "output": (path, f"Attendance_{start}_to_{end}.xlsx")
+    }
 
 @app.route("/delete_class/<int:class_id>", methods=["POST"])
 def delete_class(class_id):
@@ -1841,67 +3766,55 @@ def delete_class(class_id):
     class_name = db.execute("SELECT class_name FROM classes WHERE id=?", (class_id,)).fetchone()
     
     if not class_name:
-        db.close()
         flash("❌ Class not found", "warning")
         return redirect("/")
     
     class_name = class_name[0]
     
-    try:
-        db.execute("""
-            DELETE FROM attendance
-            WHERE student_id IN (
-                SELECT id FROM students WHERE class_id=?
-            )
+    # Students, their attendance and the class dates go with the class
+    # through ON DELETE CASCADE, all in the writer's one transaction;
+    # foreign keys do not reach into the archive, so it is cleared first
+    def delete(conn):
+        conn.execute("""
+            DELETE FROM archive.attendance
+            WHERE student_id IN (SELECT id FROM main.students WHERE class_id=?)
         """, (class_id,))
+        conn.execute("DELETE FROM archive.class_dates WHERE class_id=?", (class_id,))
+        conn.execute("DELETE FROM classes WHERE id=?", (class_id,))
+        conn.execute("DELETE FROM roster_versions WHERE class_id=?", (class_id,))
 
-        db.execute("DELETE FROM students WHERE class_id=?", (class_id,))
-        db.execute("DELETE FROM classes WHERE id=?", (class_id,))
-        db.commit()
+    try:
+        writer.submit(delete)
+        class_summaries.invalidate(class_id)
+        roster_cache.invalidate(class_id)
         flash(f"🗑️ Class '{class_name}' deleted successfully!", "success")
     except Exception as e:
         flash(f"❌ Error deleting class: {str(e)}", "warning")
-    finally:
-        db.close()
-    
-    return redirect("/")
-
-
-@app.route("/report/day/<int:class_id>")
-def day_report(class_id):
-    if not session.get("admin"):
-        return "Admin access required"
-
-    report_date = request.args.get("date", date.today().isoformat())
-    db = get_db()
-
-    rows = db.execute("""
-        SELECT s.roll_no, s.name, a.status, a.od_reason
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        WHERE s.class_id=? AND a.date=?
-        ORDER BY s.roll_no
-    """, (class_id, report_date)).fetchall()
-
-    db.close()
+    else:
+        if VACUUM_AFTER_DELETE:
+            threading.Thread(
+                target=reclaim_free_pages, name="db-vacuum", daemon=True
+            ).start()
+    
+    return redirect("/")
 
-    present = [r for r in rows if r[2] == "Present"]
-    absent = [r for r in rows if r[2] == "Absent"]
-    od = [r for r in rows if r[2] == "OD"]
 
-    html = """
+DAY_REPORT_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <title>Day Report</title>
-        """ + BASE_STYLES + """
+        """ + STYLES_LINK + """
     </head>
     <body>
         <div class="container">
             <div class="header">
                 <h1 style="color: #667eea;">📊 Day Attendance Report</h1>
                 <div>
+                    {% if archive_toggle_url %}
+                        <a href="{{ archive_toggle_url }}" class="btn btn-secondary">{{ '📅 Current Term Only' if include_archive else '🗄️ Include Archive' }}</a>
+                    {% endif %}
                     <a href="/attendance/{{ class_id }}" class="btn btn-secondary">← Back</a>
                 </div>
             </div>
@@ -1991,51 +3904,40 @@ def day_report(class_id):
     </html>
     """
 
-    return render_template_string(html, 
+
+@app.route("/report/day/<int:class_id>")
+def day_report(class_id):
+    if not session.get("admin"):
+        return "Admin access required"
+
+    report_date = request.args.get("date", date.today().isoformat())
+    include_archive = request.args.get("archive") == "1"
+    db = get_db()
+
+    rows = db.execute(f"""
+        SELECT s.roll_no, s.name, a.status, a.od_reason
+        FROM {report_source(db, include_archive)} a
+        JOIN students s ON a.student_id = s.id
+        WHERE s.class_id=? AND a.date=?
+        ORDER BY s.roll_no
+    """, (class_id, report_date)).fetchall()
+
+
+    present = [r for r in rows if r[2] == "Present"]
+    absent = [r for r in rows if r[2] == "Absent"]
+    od = [r for r in rows if r[2] == "OD"]
+
+    return render_template("day_report.html", 
                                  class_id=class_id,
                                  report_date=report_date,
+                                 include_archive=include_archive,
+                                 archive_toggle_url=archive_toggle_url(db, include_archive),
                                  present=present,
                                  absent=absent,
                                  od=od)
 
 
-@app.route("/report/total/<int:class_id>")
-def total_report(class_id):
-    if not session.get("admin"):
-        return "Admin access required"
-
-    db = get_db()
-
-    students = db.execute("""
-        SELECT id, roll_no, name
-        FROM students
-        WHERE class_id=?
-        ORDER BY roll_no
-    """, (class_id,)).fetchall()
-
-    report = []
-
-    for sid, roll, name in students:
-        stats = get_student_attendance_stats(sid, db)
-        report.append({
-            "roll": roll,
-            "name": name,
-            "total": stats["total"],
-            "present": stats["present"],
-            "absent": stats["absent"],
-            "percent": stats["percent"],
-            "status": stats["status"],
-            "badge": stats["badge"],
-            "color": stats["color"]
-        })
-
-    db.close()
-
-    safe_count = sum(1 for r in report if r['status'] == 'Safe')
-    warning_count = sum(1 for r in report if r['status'] == 'Warning')
-    defaulter_count = sum(1 for r in report if r['status'] == 'Defaulter')
-
-    html = """
+TOTAL_REPORT_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -2043,14 +3945,17 @@ def total_report(class_id):
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Total Attendance Report</title>
         <script src="https://cdn.jsdelivr.net/npm/chart.js@3.9.1/dist/chart.min.js"></script>
-        """ + BASE_STYLES + """
+        """ + STYLES_LINK + """
     </head>
     <body>
         <div class="container">
             <div class="header">
                 <h1 style="color: #667eea;">📊 Total Class Attendance Report</h1>
                 <div style="display: flex; gap: 12px;">
-                    <a href="/export/total/excel/{{ class_id }}" class="btn btn-primary">📥 Excel</a>
+                    {% if archive_toggle_url %}
+                        <a href="{{ archive_toggle_url }}" class="btn btn-secondary">{{ '📅 Current Term Only' if include_archive else '🗄️ Include Archive' }}</a>
+                    {% endif %}
+                    <a href="{{ export_url }}" class="btn btn-primary">📥 Excel</a>
                     <a href="/attendance/{{ class_id }}" class="btn btn-secondary">← Back</a>
                 </div>
             </div>
@@ -2059,7 +3964,7 @@ def total_report(class_id):
                 <div class="stats-summary">
                     <div class="stat-box">
                         <h3>👥 Total Students</h3>
-                        <div class="value">{{ report|length }}</div>
+                        <div class="value">{{ total_students }}</div>
                     </div>
                     <div class="stat-box" style="background: linear-gradient(135deg, #28a745 0%, #20c997 100%);">
                         <h3>🟢 Safe (≥75%)</h3>
@@ -2077,7 +3982,7 @@ def total_report(class_id):
 
                 <h2 style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; background-clip: text; margin: 40px 0 25px 0; font-size: 1.8em; font-weight: 800;">📋 Student Details</h2>
 
-                <div style="overflow-x: auto;">
+                <div id="reportViewport" style="overflow: auto; max-height: 640px;">
                     <table style="width: 100%; border-collapse: collapse;">
                         <thead>
                             <tr style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;">
@@ -2090,28 +3995,8 @@ def total_report(class_id):
                                 <th style="padding: 18px; text-align: center;">Status</th>
                             </tr>
                         </thead>
-                        <tbody>
-                            {% for item in report %}
-                                <tr style="border-bottom: 2px solid #f0f0f0;">
-                                    <td style="padding: 15px 18px; font-weight: 700;">{{ item.roll }}</td>
-                                    <td style="padding: 15px 18px; font-weight: 600;">{{ item.name }}</td>
-                                    <td style="padding: 15px 18px; text-align: center; font-weight: 600;">{{ item.total }}</td>
-                                    <td style="padding: 15px 18px; text-align: center; color: #28a745; font-weight: 700;">{{ item.present }}</td>
-                                    <td style="padding: 15px 18px; text-align: center; color: #dc3545; font-weight: 700;">{{ item.absent }}</td>
-                                    <td style="padding: 15px 18px; text-align: center;">
-                                        <strong style="font-size: 1.1em;">{{ item.percent }}%</strong>
-                                        <div style="height: 8px; background: #f0f0f0; border-radius: 4px; margin-top: 6px; overflow: hidden;">
-                                            <div style="height: 100%; background: {% if item.percent >= 75 %}linear-gradient(90deg, #28a745, #20c997){% elif item.percent >= 65 %}linear-gradient(90deg, #ffc107, #ff9800){% else %}linear-gradient(90deg, #dc3545, #c82333){% endif %}; 
-                                                        width: {{ item.percent }}%; transition: width 0.5s ease;"></div>
-                                        </div>
-                                    </td>
-                                    <td style="padding: 15px 18px; text-align: center;">
-                                        <span class="status-badge status-{{ item['status']|lower }}">
-                                            {{ item.badge }} {{ item.status }}
-                                        </span>
-                                    </td>
-                                </tr>
-                            {% endfor %}
+                        <tbody id="reportRows">
+                            <tr><td colspan="7" style="padding: 20px; text-align: center; color: #999;">Loading…</td></tr>
                         </tbody>
                     </table>
                 </div>
@@ -2138,165 +4023,241 @@ def total_report(class_id):
         </div>
 
         <script>
-            const students = {{ report|tojson }};
-            const labels = students.map(s => s.roll);
-            const percentages = students.map(s => s.percent);
-            const present = students.map(s => s.present);
-            const absent = students.map(s => s.absent);
-
-            // Line Chart
-            const ctxPercent = document.getElementById('percentChart').getContext('2d');
-            new Chart(ctxPercent, {
-                type: 'line',
-                data: {
-                    labels: labels,
-                    datasets: [{
-                        label: 'Attendance %',
-                        data: percentages,
-                        borderColor: '#667eea',
-                        backgroundColor: 'rgba(102, 126, 234, 0.1)',
-                        borderWidth: 4,
-                        fill: true,
-                        tension: 0.4,
-                        pointBackgroundColor: '#667eea',
-                        pointBorderColor: '#fff',
-                        pointBorderWidth: 3,
-                        pointRadius: 6,
-                        pointHoverRadius: 8,
-                        segment: {
-                            borderDash: (ctx) => ctx.p0DataIndex % 2 === 0 ? [0] : [0]
-                        }
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {
-                        legend: { display: true, labels: { font: { size: 12, weight: 'bold' } } }
+            // Rows arrive as compact JSON and only the visible slice is in the DOM
+            const ROW_HEIGHT = 72;
+            const STATUS_BADGES = { Safe: '🟢', Warning: '🟡', Defaulter: '🔴' };
+            const viewport = document.getElementById('reportViewport');
+            const tbody = document.getElementById('reportRows');
+            let reportRows = [];
+
+            function escapeHtml(value) {
+                return String(value ?? '').replace(/[&<>"']/g, c => (
+                    { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c]
+                ));
+            }
+
+            function barColor(percent) {
+                if (percent >= 75) return 'linear-gradient(90deg, #28a745, #20c997)';
+                if (percent >= 65) return 'linear-gradient(90deg, #ffc107, #ff9800)';
+                return 'linear-gradient(90deg, #dc3545, #c82333)';
+            }
+
+            function rowHtml([id, roll, name, total, present, absent, percent, status]) {
+                return `<tr style="height: ${ROW_HEIGHT}px; border-bottom: 2px solid #f0f0f0;">
+                    <td style="padding: 0 18px; font-weight: 700;">${escapeHtml(roll)}</td>
+                    <td style="padding: 0 18px; font-weight: 600;">${escapeHtml(name)}</td>
+                    <td style="padding: 0 18px; text-align: center; font-weight: 600;">${total}</td>
+                    <td style="padding: 0 18px; text-align: center; color: #28a745; font-weight: 700;">${present}</td>
+                    <td style="padding: 0 18px; text-align: center; color: #dc3545; font-weight: 700;">${absent}</td>
+                    <td style="padding: 0 18px; text-align: center;">
+                        <strong style="font-size: 1.1em;">${percent}%</strong>
+                        <div style="height: 8px; background: #f0f0f0; border-radius: 4px; margin-top: 6px; overflow: hidden;">
+                            <div style="height: 100%; background: ${barColor(percent)}; width: ${percent}%;"></div>
+                        </div>
+                    </td>
+                    <td style="padding: 0 18px; text-align: center;">
+                        <span class="status-badge status-${status.toLowerCase()}">${STATUS_BADGES[status]} ${status}</span>
+                    </td>
+                </tr>`;
+            }
+
+            function spacerRow(height) {
+                return height > 0 ? `<tr style="height: ${height}px;"><td colspan="7" style="padding: 0; border: 0;"></td></tr>` : '';
+            }
+
+            function renderVisibleRows() {
+                const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - 10);
+                const count = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 20;
+                const visible = reportRows.slice(first, first + count);
+
+                tbody.innerHTML = spacerRow(first * ROW_HEIGHT)
+                    + visible.map(rowHtml).join('')
+                    + spacerRow((reportRows.length - first - visible.length) * ROW_HEIGHT);
+            }
+
+            viewport.addEventListener('scroll', () => requestAnimationFrame(renderVisibleRows));
+
+            fetch({{ rows_url|tojson }})
+                .then(response => response.json())
+                .then(data => {
+                    reportRows = data.rows;
+                    renderVisibleRows();
+                    drawCharts(reportRows.map(([id, roll, name, total, present, absent, percent, status]) =>
+                        ({ roll, present, absent, percent, status })));
+                });
+
+            function drawCharts(students) {
+                const labels = students.map(s => s.roll);
+                const percentages = students.map(s => s.percent);
+                const present = students.map(s => s.present);
+                const absent = students.map(s => s.absent);
+
+                // Line Chart
+                const ctxPercent = document.getElementById('percentChart').getContext('2d');
+                new Chart(ctxPercent, {
+                    type: 'line',
+                    data: {
+                        labels: labels,
+                        datasets: [{
+                            label: 'Attendance %',
+                            data: percentages,
+                            borderColor: '#667eea',
+                            backgroundColor: 'rgba(102, 126, 234, 0.1)',
+                            borderWidth: 4,
+                            fill: true,
+                            tension: 0.4,
+                            pointBackgroundColor: '#667eea',
+                            pointBorderColor: '#fff',
+                            pointBorderWidth: 3,
+                            pointRadius: 6,
+                            pointHoverRadius: 8,
+                            segment: {
+                                borderDash: (ctx) => ctx.p0DataIndex % 2 === 0 ? [0] : [0]
+                            }
+                        }]
                     },
-                    scales: {
-                        y: {
-                            beginAtZero: true,
-                            max: 100,
-                            ticks: { callback: function(value) { return value + '%'; } },
-                            grid: { color: 'rgba(0, 0, 0, 0.05)' }
+                    options: {
+                        responsive: true,
+                        maintainAspectRatio: true,
+                        plugins: {
+                            legend: { display: true, labels: { font: { size: 12, weight: 'bold' } } }
                         },
-                        x: { grid: { display: false } }
+                        scales: {
+                            y: {
+                                beginAtZero: true,
+                                max: 100,
+                                ticks: { callback: function(value) { return value + '%'; } },
+                                grid: { color: 'rgba(0, 0, 0, 0.05)' }
+                            },
+                            x: { grid: { display: false } }
+                        }
                     }
-                }
-            });
-
-            // Doughnut Chart
-            const statusCounts = {
-                Safe: students.filter(s => s.status === 'Safe').length,
-                Warning: students.filter(s => s.status === 'Warning').length,
-                Defaulter: students.filter(s => s.status === 'Defaulter').length
-            };
-
-            const ctxStatus = document.getElementById('statusChart').getContext('2d');
-            new Chart(ctxStatus, {
-                type: 'doughnut',
-                data: {
-                    labels: ['🟢 Safe (≥75%)', '🟡 Warning (65-74%)', '🔴 Defaulter (<65%)'],
-                    datasets: [{
-                        data: [statusCounts.Safe, statusCounts.Warning, statusCounts.Defaulter],
-                        backgroundColor: ['#28a745', '#ffc107', '#dc3545'],
-                        borderColor: '#fff',
-                        borderWidth: 3
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    plugins: {
-                        legend: { position: 'bottom', labels: { font: { size: 12, weight: 'bold' }, padding: 20 } }
+                });
+
+                // Doughnut Chart
+                const statusCounts = {
+                    Safe: students.filter(s => s.status === 'Safe').length,
+                    Warning: students.filter(s => s.status === 'Warning').length,
+                    Defaulter: students.filter(s => s.status === 'Defaulter').length
+                };
+
+                const ctxStatus = document.getElementById('statusChart').getContext('2d');
+                new Chart(ctxStatus, {
+                    type: 'doughnut',
+                    data: {
+                        labels: ['🟢 Safe (≥75%)', '🟡 Warning (65-74%)', '🔴 Defaulter (<65%)'],
+                        datasets: [{
+                            data: [statusCounts.Safe, statusCounts.Warning, statusCounts.Defaulter],
+                            backgroundColor: ['#28a745', '#ffc107', '#dc3545'],
+                            borderColor: '#fff',
+                            borderWidth: 3
+                        }]
+                    },
+                    options: {
+                        responsive: true,
+                        plugins: {
+                            legend: { position: 'bottom', labels: { font: { size: 12, weight: 'bold' }, padding: 20 } }
+                        }
                     }
-                }
-            });
-
-            // Bar Chart
-            const ctxBar = document.getElementById('presentAbsentChart').getContext('2d');
-            new Chart(ctxBar, {
-                type: 'bar',
-                data: {
-                    labels: labels,
-                    datasets: [
-                        {
-                            label: '✅ Present',
-                            data: present,
-                            backgroundColor: '#28a745',
-                            borderColor: '#228636',
-                            borderWidth: 2
+                });
+
+                // Bar Chart
+                const ctxBar = document.getElementById('presentAbsentChart').getContext('2d');
+                new Chart(ctxBar, {
+                    type: 'bar',
+                    data: {
+                        labels: labels,
+                        datasets: [
+                            {
+                                label: '✅ Present',
+                                data: present,
+                                backgroundColor: '#28a745',
+                                borderColor: '#228636',
+                                borderWidth: 2
+                            },
+                            {
+                                label: '❌ Absent',
+                                data: absent,
+                                backgroundColor: '#dc3545',
+                                borderColor: '#bd2130',
+                                borderWidth: 2
+                            }
+                        ]
+                    },
+                    options: {
+                        responsive: true,
+                        scales: {
+                            x: { stacked: false },
+                            y: { stacked: false }
                         },
-                        {
-                            label: '❌ Absent',
-                            data: absent,
-                            backgroundColor: '#dc3545',
-                            borderColor: '#bd2130',
-                            borderWidth: 2
+                        plugins: {
+                            legend: { labels: { font: { size: 12, weight: 'bold' } } }
                         }
-                    ]
-                },
-                options: {
-                    responsive: true,
-                    scales: {
-                        x: { stacked: false },
-                        y: { stacked: false }
-                    },
-                    plugins: {
-                        legend: { labels: { font: { size: 12, weight: 'bold' } } }
                     }
-                }
-            });
+                });
+            }
         </script>
     </body>
     </html>
     """
 
-    return render_template_string(html, 
-                                 class_id=class_id,
-                                 report=report,
-                                 safe_count=safe_count,
-                                 warning_count=warning_count,
-                                 defaulter_count=defaulter_count)
-
 
-@app.route("/report/student/<int:sid>")
-def student_report(sid):
+@app.route("/report/total/<int:class_id>")
+def total_report(class_id):
     if not session.get("admin"):
         return "Admin access required"
 
+    start = request.args.get("start")
+    end = request.args.get("end")
+    include_archive = request.args.get("archive") == "1"
     db = get_db()
+    source = report_source(db, include_archive)
+    summary = summarize_class_stats(get_class_stats_for_range(class_id, db, start, end, source))
+    query = {"start": start or None, "end": end or None, "archive": "1" if include_archive else None}
 
-    student = db.execute(
-        "SELECT roll_no, name FROM students WHERE id=?",
-        (sid,)
-    ).fetchone()
-
-    records = db.execute(
-        "SELECT date, status, od_reason FROM attendance WHERE student_id=? ORDER BY date",
-        (sid,)
-    ).fetchall()
-
-    stats = get_student_attendance_stats(sid, db)
+    return render_template("total_report.html", 
+                                 class_id=class_id,
+                                 rows_url=url_for("total_report_rows", class_id=class_id, **query),
+                                 export_url=url_for("export_total_excel", class_id=class_id, **query),
+                                 include_archive=include_archive,
+                                 archive_toggle_url=archive_toggle_url(db, include_archive),
+                                 total_students=summary["total_students"],
+                                 safe_count=summary["safe"],
+                                 warning_count=summary["warning"],
+                                 defaulter_count=summary["defaulters"])
+
+
+@app.route("/report/total/<int:class_id>/rows")
+def total_report_rows(class_id):
+    """Compact rows for the virtualized total report table"""
+    if not session.get("admin"):
+        return jsonify({"error": "Admin access required"}), 403
 
-    absent_dates = [r[0] for r in records if r[1] == "Absent"]
-    od_records = [(r[0], r[2]) for r in records if r[1] == "OD"]
+    db = get_db()
+    return jsonify(compact_stats(get_class_stats_for_range(
+        class_id, db, request.args.get("start"), request.args.get("end"),
+        report_source(db, request.args.get("archive") == "1")
+    )))
 
-    db.close()
 
-    html = """
+STUDENT_REPORT_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <title>Student Report</title>
-        """ + BASE_STYLES + """
+        """ + STYLES_LINK + """
     </head>
     <body>
         <div class="container">
             <div class="header">
                 <h1 style="color: #667eea;">📊 Student Report</h1>
-                <a href="/" class="btn btn-secondary">← Back</a>
+                <div style="display: flex; gap: 12px;">
+                    {% if archive_toggle_url %}
+                        <a href="{{ archive_toggle_url }}" class="btn btn-secondary">{{ '📅 Current Term Only' if include_archive else '🗄️ Include Archive' }}</a>
+                    {% endif %}
+                    <a href="/" class="btn btn-secondary">← Back</a>
+                </div>
             </div>
 
             <div style="background: rgba(255, 255, 255, 0.98); border-radius: 20px; padding: 40px; box-shadow: 0 20px 60px rgba(0, 0, 0, 0.1); border: 1px solid rgba(255, 255, 255, 0.5);">
@@ -2314,6 +4275,10 @@ def student_report(sid):
                         <h3>{{ badge }} Status</h3>
                         <div class="value" style="font-size: 1.8em;">{{ status }}</div>
                     </div>
+                    <div class="stat-box">
+                        <h3>📉 Longest Absence</h3>
+                        <div class="value">{{ absent_streak }}</div>
+                    </div>
                 </div>
 
                 {% if absent_dates %}
@@ -2352,12 +4317,36 @@ def student_report(sid):
     </html>
     """
 
-    return render_template_string(html,
+
+@app.route("/report/student/<int:sid>")
+def student_report(sid):
+    if not session.get("admin"):
+        return "Admin access required"
+
+    db = get_db()
+
+    student = db.execute(
+        "SELECT roll_no, name, class_id FROM students WHERE id=?", (sid,)
+    ).fetchone()
+    if not student:
+        return "Student not found", 404
+
+    include_archive = request.args.get("archive") == "1"
+    matrix = AttendanceMatrix.load(
+        student[2], db, student_id=sid, source=report_source(db, include_archive)
+    )
+    stats = matrix.student_stats()[0]
+    absent_dates, od_records = matrix.student_records(0)
+
+    return render_template("student_report.html",
                                  student=student,
                                  percent=stats['percent'],
                                  status=stats['status'],
                                  badge=stats['badge'],
                                  color=stats['color'],
+                                 absent_streak=int(matrix.longest_absent_streaks()[0]),
+                                 include_archive=include_archive,
+                                 archive_toggle_url=archive_toggle_url(db, include_archive),
                                  absent_dates=absent_dates,
                                  od_records=od_records)
 
@@ -2374,145 +4363,61 @@ def import_excel(class_id):
         return redirect(f"/attendance/{class_id}")
 
     filename = file.filename.lower()
-    students_data = []
+    if filename.endswith(('.xlsx', '.xls')):
+        fmt = "excel"
+    elif filename.endswith('.docx'):
+        fmt = "docx"
+    elif filename.endswith('.pdf'):
+        fmt = "pdf"
+    else:
+        flash("❌ Unsupported file format. Use Excel (.xlsx), Word (.docx), or PDF (.pdf)", "warning")
+        return redirect(f"/attendance/{class_id}")
 
+    # Spool the upload to disk; parsing and inserting happen in a job
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
     try:
-        # Excel files
-        if filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file)
-            roll_col, name_col = detect_columns(df.columns)
-            
-            if not roll_col or not name_col:
-                flash("❌ Required columns (Roll/Reg No & Name) not found in Excel", "warning")
-                return redirect(f"/attendance/{class_id}")
-            
-            for _, row in df.iterrows():
-                roll = row[roll_col]
-                name = row[name_col]
-                
-                if pd.isna(roll) or pd.isna(name):
-                    continue
-                
-                roll = str(roll).strip()
-                name = str(name).strip()
-                
-                if not roll or not name or roll.lower() == "nan" or name.lower() == "nan":
-                    continue
-                
-                students_data.append((roll, name))
+        with os.fdopen(fd, "wb") as f:
+            file.save(f)
+        if fmt == "pdf":
+            pdf_page_count(path)
+        job_id = enqueue_job("import", class_id, run_import_job, class_id, path, fmt)
+    except Exception as e:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        flash(f"❌ Error importing file: {str(e)}", "warning")
+        return redirect(f"/attendance/{class_id}")
 
-        # Word files (DOCX)
-        elif filename.endswith('.docx'):
-            doc = docx.Document(file)
-            
-            for table in doc.tables:
-                for row in table.rows[1:]:  # Skip header
-                    if len(row.cells) >= 2:
-                        roll = row.cells[0].text.strip()
-                        name = row.cells[1].text.strip()
-                        
-                        if roll and name and roll.lower() != "nan" and name.lower() != "nan":
-                            students_data.append((roll, name))
-            
-            # Also check paragraphs for data
-            if not students_data:
-                for para in doc.paragraphs:
-                    text = para.text.strip()
-                    if ' - ' in text or ',' in text:
-                        parts = text.replace(' - ', ',').split(',')
-                        if len(parts) >= 2:
-                            roll = parts[0].strip()
-                            name = parts[1].strip()
-                            if roll and name:
-                                students_data.append((roll, name))
-            
-            if not students_data:
-                flash("❌ No student data found in Word document (use format: Roll - Name or Roll, Name)", "warning")
-                return redirect(f"/attendance/{class_id}")
+    return redirect(f"/attendance/{class_id}?job={job_id}")
 
-        # PDF files
-        elif filename.endswith('.pdf'):
-            pdf_reader = PdfReader(file)
-            
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                lines = text.split('\n')
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line or line.lower() in ['roll no', 'name', 'roll', 'student']:
-                        continue
-                    
-                    # Try to parse: Roll - Name or Roll, Name
-                    if ' - ' in line:
-                        parts = line.split(' - ')
-                    elif ',' in line:
-                        parts = line.split(',')
-                    else:
-                        continue
-                    
-                    if len(parts) >= 2:
-                        roll = parts[0].strip()
-                        name = parts[1].strip()
-                        
-                        if roll and name and len(roll) > 0 and len(name) > 0:
-                            # Check if it looks like valid data (avoid headers/footers)
-                            if not any(keyword in roll.lower() for keyword in ['roll', 'name', 'date', 'page']):
-                                students_data.append((roll, name))
-            
-            if not students_data:
-                flash("❌ No student data found in PDF (use format: Roll - Name per line)", "warning")
-                return redirect(f"/attendance/{class_id}")
 
-        else:
-            flash("❌ Unsupported file format. Use Excel (.xlsx), Word (.docx), or PDF (.pdf)", "warning")
-            return redirect(f"/attendance/{class_id}")
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_students = []
-        for roll, name in students_data:
-            key = (roll.lower(), name.lower())
-            if key not in seen:
-                seen.add(key)
-                unique_students.append((roll, name))
-
-        # Insert into database
-        db = get_db()
-        count = 0
-        duplicates = 0
-
-        for roll, name in unique_students:
-            # Check if student already exists
-            existing = db.execute(
-                "SELECT id FROM students WHERE roll_no=? AND class_id=?",
-                (roll, class_id)
-            ).fetchone()
-            
-            if existing:
-                duplicates += 1
-                continue
-            
-            db.execute(
-                "INSERT INTO students (roll_no, name, class_id) VALUES (?, ?, ?)",
-                (roll, name, class_id)
-            )
-            count += 1
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    if not session.get("admin"):
+        return jsonify({"error": "Admin access required"}), 403
 
-        db.commit()
-        db.close()
+    job = get_job(job_id, get_db())
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
 
-        msg = f"✅ Import successful! {count} students added"
-        if duplicates > 0:
-            msg += f" ({duplicates} duplicates skipped)"
-        
-        flash(msg, "success")
+    payload = {k: job[k] for k in JOB_FIELDS if k not in ("output_path", "output_name")}
+    if job["state"] == "done" and job["output_path"]:
+        payload["download"] = f"/jobs/{job_id}/download"
+    return jsonify(payload)
 
-    except Exception as e:
-        flash(f"❌ Error importing file: {str(e)}", "warning")
-        return redirect(f"/attendance/{class_id}")
 
-    return redirect(f"/attendance/{class_id}")
+@app.route("/jobs/<job_id>/download")
+def job_download(job_id):
+    if not session.get("admin"):
+        return "Admin access required"
+
+    job = get_job(job_id, get_db())
+    if (not job or job["state"] != "done" or not job["output_path"]
+            or not os.path.exists(job["output_path"])):
+        return "Job output not available (it may have expired)", 404
+
+    return send_file(job["output_path"], as_attachment=True, download_name=job["output_name"])
 
 
 @app.route("/export/total/excel/<int:class_id>")
@@ -2522,46 +4427,35 @@ def export_total_excel(class_id):
 
     db = get_db()
 
-    students = db.execute(
-        "SELECT id, roll_no, name FROM students WHERE class_id=? ORDER BY roll_no",
-        (class_id,)
-    ).fetchall()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Total Class Report"
-
-    ws.append([
-        "Roll No",
-        "Name",
-        "Total Days",
-        "Present + OD",
-        "Absent",
-        "Attendance %",
-        "Status"
-    ])
-
-    for sid, roll, name in students:
-        stats = get_student_attendance_stats(sid, db)
-        ws.append([
-            roll,
-            name,
+    rows = (
+        [
+            stats["roll"],
+            stats["name"],
             stats["total"],
             stats["present"],
             stats["absent"],
             stats["percent"],
             stats["status"]
-        ])
-
-    db.close()
-
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-    wb.save(tmp.name)
+        ]
+        for stats in get_class_stats_for_range(
+            class_id, db, request.args.get("start"), request.args.get("end"),
+            report_source(db, request.args.get("archive") == "1")
+        )
+    )
 
-    return send_file(
-        tmp.name,
-        as_attachment=True,
-        download_name="Total_Class_Attendance_Report.xlsx"
+    return send_xlsx(
+        "Total Class Report",
+        [
+            "Roll No",
+            "Name",
+            "Total Days",
+            "Present + OD",
+            "Absent",
+            "Attendance %",
+            "Status"
+        ],
+        rows,
+        "Total_Class_Attendance_Report.xlsx"
     )
 
 
@@ -2573,97 +4467,587 @@ def export_day_excel(class_id):
     report_date = request.args.get("date", date.today().isoformat())
     db = get_db()
 
-    rows = db.execute("""
+    rows = db.execute(f"""
         SELECT s.roll_no, s.name, a.status, a.od_reason
-        FROM attendance a
+        FROM {report_source(db, request.args.get("archive") == "1")} a
         JOIN students s ON a.student_id = s.id
         WHERE s.class_id=? AND a.date=?
-    """, (class_id, report_date)).fetchall()
-
-    db.close()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Day Report"
-
-    ws.append(["Roll No", "Name", "Status", "OD Reason"])
-    for r in rows:
-        ws.append(r)
-
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-    wb.save(tmp.name)
+    """, (class_id, report_date))
 
-    return send_file(
-        tmp.name,
-        as_attachment=True,
-        download_name=f"Day_Report_{report_date}.xlsx"
+    return send_xlsx(
+        "Day Report",
+        ["Roll No", "Name", "Status", "OD Reason"],
+        rows,
+        f"Day_Report_{report_date}.xlsx"
     )
 
 
 @app.route("/save_attendance", methods=["POST"])
 def save_attendance():
-    class_id = request.form["class_id"]
+    class_id = request.form.get("class_id", type=int)
     selected_date = request.form["selected_date"]
     today = date.today().isoformat()
     db = get_db()
 
+    if class_id is None:
+        return "Invalid class", 400
+
     if selected_date != today and not session.get("admin"):
-        db.close()
         return "Admin password required to edit previous dates"
 
-    db.execute("""
-        DELETE FROM attendance
-        WHERE date=? AND student_id IN
-        (SELECT id FROM students WHERE class_id=?)
-    """, (selected_date, class_id))
+    cutoff = get_archive_cutoff(db)
+    if cutoff and selected_date < cutoff:
+        flash(f"❌ {selected_date} is in an archived term and can no longer be edited", "warning")
+        return redirect(f"/attendance/{class_id}")
 
-    students = db.execute(
-        "SELECT id FROM students WHERE class_id=?", (class_id,)
-    ).fetchall()
+    students = get_roster(class_id, db).ids
+
+    # A paginated form only carries its own page of students
+    page_ids = set(request.form.getlist("student_ids"))
+    if page_ids:
+        students = [sid for sid in students if str(sid) in page_ids]
 
     defaulted = 0
+    marks = []
 
-    for (sid,) in students:
+    for sid in students:
         status = request.form.get(f"status_{sid}")
 
         if status not in ["Present", "Absent", "OD"]:
             status = "Present"
             defaulted += 1
 
-        reason = request.form.get(f"r_{sid}")
-
-        db.execute(
-            "INSERT INTO attendance (student_id, date, status, od_reason) VALUES (?, ?, ?, ?)",
+        marks.append((sid, status, request.form.get(f"r_{sid}")))
+
+    back = f"/attendance/{class_id}?date={selected_date}"
+    page = request.form.get("page", type=int)
+    if page:
+        back += f"&page={page}"
+
+    # Diffed against the stored marks inside the write transaction, so a
+    # concurrent save of the same class and day is never overwritten stale
+    def save(conn):
+        existing = {
+            sid: (status, reason)
+            for sid, status, reason in conn.execute("""
+                SELECT a.student_id, a.status, a.od_reason
+                FROM attendance a
+                JOIN students s ON a.student_id = s.id
+                WHERE s.class_id=? AND a.date=?
+            """, (class_id, selected_date))
+        }
+        changes = [
             (sid, selected_date, status, reason)
-        )
+            for sid, status, reason in marks
+            if existing.get(sid) != (status, reason)
+        ]
+
+        if changes:
+            conn.executemany("""
+                INSERT INTO attendance (student_id, date, status, od_reason)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(student_id, date) DO UPDATE SET
+                    status=excluded.status,
+                    od_reason=excluded.od_reason
+            """, changes)
+
+        if students:
+            conn.execute(
+                "INSERT OR IGNORE INTO class_dates (class_id, date) VALUES (?, ?)",
+                (class_id, selected_date)
+            )
+        return len(changes)
+
+    try:
+        changed = writer.submit(save)
+    except (WriteTimeout, sqlite3.Error) as e:
+        flash(f"❌ Attendance not saved, please try again ({e})", "warning")
+        return redirect(back)
 
-    db.commit()
-    db.close()
+    if changed:
+        class_summaries.invalidate(class_id)
 
     if defaulted > 0:
         flash(
-            f"⚠️ {defaulted} students had no status selected. Marked as PRESENT.",
+            f"⚠️ {defaulted} students had no status selected. Marked as PRESENT. "
+            f"({changed} records changed)",
             "warning"
         )
     else:
-        flash("✅ Attendance saved successfully!", "success")
+        flash(f"✅ Attendance saved successfully! ({changed} records changed)", "success")
 
-    return redirect(f"/attendance/{class_id}?date={selected_date}")
+    return redirect(back)
 
 
-def open_browser():
-    webbrowser.open("http://127.0.0.1:5050")
+# ====================== JSON API ======================
+# Read-only, versioned views over the same queries as the HTML pages.
+# Responses carry a weak ETag (304 on If-None-Match) and are gzipped when
+# the client accepts it.
 
+API_GZIP_MIN_SIZE = 1024
 
-if __name__ == "__main__":
+
+def api_response(payload):
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    etag = hashlib.sha1(body).hexdigest()
+
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(body)
+        response.mimetype = "application/json"
+
+        if len(body) >= API_GZIP_MIN_SIZE and "gzip" in request.accept_encodings:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.headers["Content-Encoding"] = "gzip"
+
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def api_error(message, status):
+    return jsonify({"error": message}), status
+
+
+@app.route("/api/v1/classes")
+def api_classes():
+    db = get_db()
+    rows = db.execute("""
+        SELECT c.id, c.class_name, COUNT(s.id)
+        FROM classes c
+        LEFT JOIN students s ON s.class_id = c.id
+        GROUP BY c.id
+        ORDER BY c.id
+    """).fetchall()
+
+    return api_response({"columns": ["id", "name", "students"], "rows": rows})
+
+
+@app.route("/api/v1/classes/<int:class_id>/students")
+def api_class_students(class_id):
+    db = get_db()
+    if not db.execute("SELECT 1 FROM classes WHERE id=?", (class_id,)).fetchone():
+        return api_error("Class not found", 404)
+
+    rows = db.execute(
+        "SELECT id, roll_no, name FROM students WHERE class_id=? ORDER BY roll_no, id",
+        (class_id,)
+    ).fetchall()
+
+    return api_response({"class_id": class_id, "columns": ["id", "roll", "name"], "rows": rows})
+
+
+@app.route("/api/v1/classes/<int:class_id>/attendance")
+def api_class_attendance(class_id):
+    day = request.args.get("date", date.today().isoformat())
+
+    db = get_db()
+    if not db.execute("SELECT 1 FROM classes WHERE id=?", (class_id,)).fetchone():
+        return api_error("Class not found", 404)
+
+    rows = [
+        (sid, roll, name, status, reason)
+        for sid, roll, name, _, status, reason in get_roster_for_date(class_id, day, db)
+    ]
+
+    return api_response({
+        "class_id": class_id,
+        "date": day,
+        "columns": ["id", "roll", "name", "status", "od_reason"],
+        "rows": rows
+    })
+
+
+@app.route("/api/v1/classes/<int:class_id>/stats")
+def api_class_stats(class_id):
+    if not session.get("admin"):
+        return api_error("Admin access required", 403)
+
+    db = get_db()
+    if not db.execute("SELECT 1 FROM classes WHERE id=?", (class_id,)).fetchone():
+        return api_error("Class not found", 404)
+
+    student_stats = get_class_attendance_stats(class_id, db)
+    payload = compact_stats(student_stats)
+    payload.update({"class_id": class_id, "summary": summarize_class_stats(student_stats)})
+
+    return api_response(payload)
+
+
+@app.route("/api/v1/students/<int:sid>/stats")
+def api_student_stats(sid):
+    if not session.get("admin"):
+        return api_error("Admin access required", 403)
+
+    db = get_db()
+    student, records = get_student_history(sid, db)
+    if not student:
+        return api_error("Student not found", 404)
+
+    stats = get_student_attendance_stats(sid, db)
+
+    return api_response({
+        "id": sid,
+        "roll": student[0],
+        "name": student[1],
+        "total": stats["total"],
+        "present": stats["present"],
+        "absent": stats["absent"],
+        "percent": stats["percent"],
+        "status": stats["status"],
+        "absent_dates": [r[0] for r in records if r[1] == "Absent"],
+        "od_records": [(r[0], r[2]) for r in records if r[1] == "OD"]
+    })
+
+
+@app.route("/api/v1/metrics/writes")
+def api_write_metrics():
+    # Counters are per worker process
+    metrics = writer.metrics()
+    metrics["pid"] = os.getpid()
+    return jsonify(metrics)
+
+
+@app.route("/api/v1/metrics/requests")
+def api_request_metrics():
+    # Rolling window of the last TIMING_WINDOW requests per route, per process
+    return jsonify({
+        "pid": os.getpid(),
+        "window": TIMING_WINDOW,
+        "routes": request_timing_summary(),
+        "slow_query_ms": SLOW_QUERY_MS or None,
+        "slow_queries": list(slow_queries)
+    })
+
+
+@app.route("/api/v1/metrics/cache")
+def api_cache_metrics():
+    return jsonify({
+        "pid": os.getpid(),
+        "summaries": class_summaries.metrics(),
+        "rosters": roster_cache.metrics()
+    })
+
+
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_ERRORS = 500
+BULK_FIELDS = ("class", "class_id", "roll_no", "date", "status", "od_reason")
+ATTENDANCE_STATUSES = ("Present", "Absent", "OD")
+
+
+def read_bulk_records(stream, fmt):
+    """Yield (line_no, dict) from an NDJSON or CSV text stream"""
+    if fmt == "csv":
+        for line_no, record in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, record
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, None
+            continue
+        yield line_no, record
+
+
+@app.route("/api/v1/attendance/bulk", methods=["POST"])
+def api_bulk_attendance():
+    """Apply many (class, roll_no, date, status, od_reason) marks in one call.
+
+    The body is NDJSON (one object per line) or CSV with a header row,
+    either raw or as an uploaded "file". class may be a class name or id.
+    Rows are validated against the cached class rosters and written in
+    chunked UPSERT transactions; bad rows are reported by line number.
+    """
+    if not session.get("admin"):
+        return api_error("Admin access required", 403)
+
+    upload = request.files.get("file")
+    if upload:
+        fmt = "csv" if upload.filename.lower().endswith(".csv") else "ndjson"
+        raw = upload.stream
+    else:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+        raw = request.stream
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+    started = time.perf_counter()
+    db = get_db()
+
+    class_ids = {}
+    for cid, cname in db.execute("SELECT id, class_name FROM classes"):
+        class_ids[str(cid)] = cid
+        class_ids[cname.strip().lower()] = cid
+
+    rosters = {}
+    cutoff = get_archive_cutoff(db)
+
+    def student_id(cid, roll):
+        if cid not in rosters:
+            rosters[cid] = get_roster(cid, db).by_roll
+        return rosters[cid].get(roll)
+
+    received = applied = 0
+    errors = []
+    chunk = []
+    chunk_dates = set()
+
+    def write_chunk(conn):
+        conn.executemany("""
+            INSERT INTO attendance (student_id, date, status, od_reason)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(student_id, date) DO UPDATE SET
+                status=excluded.status,
+                od_reason=excluded.od_reason
+        """, chunk)
+        conn.executemany(
+            "INSERT OR IGNORE INTO class_dates (class_id, date) VALUES (?, ?)",
+            chunk_dates
+        )
+
+    def flush():
+        nonlocal applied
+        writer.submit(write_chunk)
+        class_summaries.invalidate(*{cid for cid, _ in chunk_dates})
+        applied += len(chunk)
+        chunk.clear()
+        chunk_dates.clear()
+
+    try:
+        for line_no, record in read_bulk_records(stream, fmt):
+            received += 1
+            error = None
+
+            if not isinstance(record, dict):
+                error = "not a valid record"
+            else:
+                # NDJSON values may be objects or lists; those never reach SQLite
+                bad = [key for key in BULK_FIELDS
+                       if not isinstance(record.get(key), (str, int, float, type(None)))]
+                if bad:
+                    error = f"'{bad[0]}' must be a string"
+                else:
+                    cid = class_ids.get(str(record.get("class") or record.get("class_id") or "").strip().lower())
+                    roll = str(record.get("roll_no") or "").strip()
+                    day = str(record.get("date") or "").strip()
+                    status = str(record.get("status") or "").strip()
+                    reason = str(record.get("od_reason") or "") or None
+
+                    try:
+                        day = date.fromisoformat(day).isoformat()
+                    except ValueError:
+                        error = f"invalid date '{day}'"
+                    else:
+                        if cutoff and day < cutoff:
+                            error = f"date '{day}' is in an archived term"
+
+                # Report the first failure; skip the roster lookup once a row has failed
+                if not error:
+                    sid = None if cid is None else student_id(cid, roll)
+                    if cid is None:
+                        error = "unknown class"
+                    elif sid is None:
+                        error = f"unknown roll_no '{roll}'"
+                    elif status not in ATTENDANCE_STATUSES:
+                        error = f"invalid status '{status}'"
+
+            if error:
+                if len(errors) < BULK_MAX_ERRORS:
+                    errors.append({"line": line_no, "error": error})
+                continue
+
+            chunk.append((sid, day, status, reason))
+            chunk_dates.add((cid, day))
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                flush()
+
+        if chunk:
+            flush()
+    except (WriteTimeout, sqlite3.Error) as e:
+        # Chunks already flushed stay applied
+        return jsonify({
+            "error": f"write failed: {e}",
+            "received": received,
+            "applied": applied
+        }), 503
+
+    elapsed = time.perf_counter() - started
+    return jsonify({
+        "received": received,
+        "applied": applied,
+        "rejected": received - applied,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(received / elapsed) if elapsed else received
+    })
+
+
+# ====================== TEMPLATES ======================
+# Pages are served from a DictLoader and compiled once here at startup
+TEMPLATES = {
+    "dashboard.html": DASHBOARD_TEMPLATE,
+    "attendance.html": ATTENDANCE_TEMPLATE,
+    "day_report.html": DAY_REPORT_TEMPLATE,
+    "total_report.html": TOTAL_REPORT_TEMPLATE,
+    "student_report.html": STUDENT_REPORT_TEMPLATE,
+}
+
+app.jinja_env.loader = ChoiceLoader([DictLoader(TEMPLATES), app.jinja_env.loader])
+for template_name in TEMPLATES:
+    app.jinja_env.get_template(template_name)
+
+
+@app.cli.command("check-stats")
+@click.option("--rebuild", is_flag=True, help="Recompute student_stats from the attendance rows.")
+def check_stats_command(rebuild):
+    """Verify the student_stats counters against the raw attendance rows."""
     init_db_if_needed()
+    conn = connect_db()
+    mismatched = check_student_stats(conn)
 
-    if not os.environ.get("WERKZEUG_RUN_MAIN"):
-        threading.Timer(1.2, open_browser).start()
+    if mismatched:
+        click.echo(f"{len(mismatched)} students out of sync: {mismatched[:20]}")
+    else:
+        click.echo("student_stats is consistent")
+
+    if rebuild:
+        rebuild_student_stats(conn)
+        click.echo("student_stats rebuilt from attendance")
+
+    conn.close()
+
+
+@app.cli.command("archive")
+@click.argument("cutoff")
+def archive_command(cutoff):
+    """Move attendance dated before CUTOFF (YYYY-MM-DD) into the archive."""
+    cutoff = date.fromisoformat(cutoff).isoformat()
+    init_db_if_needed()
+    moved = archive_attendance(
+        cutoff, lambda fraction, message: click.echo(f"{fraction:6.1%}  {message}")
+    )
+    click.echo(f"Archived {moved} records dated before {cutoff} into {ARCHIVE_PATH}")
+
+
+@app.cli.command("compact-db")
+def compact_db_command():
+    """Rebuild the database once with auto_vacuum=INCREMENTAL.
+
+    Afterwards deleting a class gives its pages back to the filesystem
+    without another full VACUUM. Stop the server before running this.
+    """
+    init_db_if_needed()
+    conn = connect_db()
+
+    def size():
+        return (
+            conn.execute("PRAGMA page_count").fetchone()[0]
+            * conn.execute("PRAGMA page_size").fetchone()[0]
+        )
+
+    before = size()
 
-    app.run(
-        host="127.0.0.1",
-        port=5050,
-        debug=False,
-        use_reloader=False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    click.echo(
+        f"{before / 1e6:.1f} MB -> {size() / 1e6:.1f} MB, "
+        f"auto_vacuum={'incremental' if mode == 2 else mode}"
     )
+    conn.close()
+
+
+def open_browser(url="http://127.0.0.1:5050"):
+    webbrowser.open(url)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Perfect Attendance Monitor")
+    parser.add_argument("--host", default=os.getenv("ATTENDANCE_HOST", "127.0.0.1"),
+                        help="interface to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("ATTENDANCE_PORT", "5050")),
+                        help="port to listen on (default 5050)")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="request threads per worker (default 8)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes sharing the socket; POSIX only (default 1)")
+    parser.add_argument("--dev", action="store_true",
+                        help="use the Werkzeug development server instead of waitress")
+    parser.add_argument("--no-browser", action="store_true",
+                        help="do not open the dashboard in a browser on start")
+    return parser.parse_args(argv)
+
+
+def _raise_system_exit(signum, frame):
+    # waitress drains in-flight requests when its loop sees SystemExit
+    raise SystemExit(0)
+
+
+def serve(args):
+    """Serve the app with waitress, falling back to Werkzeug with --dev"""
+    try:
+        from waitress import create_server
+    except ImportError:
+        create_server = None
+        if not args.dev:
+            print("waitress is not installed; using the development server")
+
+    if args.dev or create_server is None:
+        app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
+        return
+
+    listener = socket.create_server((args.host, args.port), backlog=1024)
+    workers = args.workers if hasattr(os, "fork") else 1
+    if workers != args.workers:
+        print("--workers needs fork(); serving from a single process")
+
+    def run_worker():
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+        server = create_server(app, sockets=[listener], threads=args.threads)
+        server.run()
+
+    if workers <= 1:
+        run_worker()
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop_children(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    # Needed for the PDF process pool in the frozen Windows build
+    multiprocessing.freeze_support()
+    args = parse_args()
+    init_db_if_needed()
+    fail_interrupted_jobs()
+
+    if not args.no_browser and not os.environ.get("WERKZEUG_RUN_MAIN"):
+        browse_host = "127.0.0.1" if args.host in ("0.0.0.0", "::") else args.host
+        threading.Timer(1.2, open_browser, args=(f"http://{browse_host}:{args.port}",)).start()
+
+    serve(args)
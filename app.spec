@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('database.db', '.'), ('static', 'static')],
-    hiddenimports=[],
+    hiddenimports=['pandas', 'openpyxl', 'docx', 'PyPDF2', 'numpy', 'waitress'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,98 @@
+"""Analytics: per-row tuples vs the AttendanceMatrix engine.
+
+Generates one synthetic class (80 students x 180 days by default) and times
+the work behind the student report and a date-range total report, once
+with the old fetchall + list comprehension code and once through
+AttendanceMatrix.
+
+    python benchmarks/attendance_matrix.py [--students 80] [--days 180] [--iterations 20]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# suite points ATTENDANCE_DB at a throwaway database before importing app
+from suite import attendance_app, generate
+
+RANGE_SQL = """
+    SELECT s.id, s.roll_no, s.name, a.date, a.status, a.od_reason
+    FROM attendance a
+    JOIN students s ON a.student_id = s.id
+    WHERE s.class_id=? AND a.date BETWEEN ? AND ?
+    ORDER BY a.date, s.roll_no
+"""
+
+
+def rows_student_report(db, sid):
+    student, records = attendance_app.get_student_history(sid, db)
+    absent_dates = [r[0] for r in records if r[1] == "Absent"]
+    od_records = [(r[0], r[2]) for r in records if r[1] == "OD"]
+    total = len(records)
+    present = sum(1 for r in records if r[1] in ("Present", "OD"))
+    return attendance_app.build_attendance_stats(total, present), absent_dates, od_records
+
+
+def matrix_student_report(db, sid):
+    matrix = attendance_app.AttendanceMatrix.load(1, db, student_id=sid)
+    absent_dates, od_records = matrix.student_records(0)
+    return matrix.student_stats()[0], absent_dates, od_records
+
+
+def rows_range_totals(db, start, end):
+    counts = {}
+    for sid, roll, name, _, status, _ in db.execute(RANGE_SQL, (1, start, end)):
+        entry = counts.setdefault(sid, [roll, name, 0, 0])
+        entry[2] += 1
+        if status in ("Present", "OD"):
+            entry[3] += 1
+    return [
+        attendance_app.build_attendance_stats(total, present)
+        for _, _, total, present in counts.values()
+    ]
+
+
+def matrix_range_totals(db, start, end):
+    return attendance_app.AttendanceMatrix.load(1, db, start, end).student_stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=80)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    attendance_app.init_db_if_needed()
+    db = attendance_app.connect_db()
+    dates = generate(db, 1, args.students, args.days, seed=1)
+    sid = db.execute("SELECT MIN(id) FROM students").fetchone()[0]
+    start, end = dates[len(dates) // 4], dates[3 * len(dates) // 4]
+
+    cases = [
+        ("student report", rows_student_report, matrix_student_report, (db, sid)),
+        ("range totals", rows_range_totals, matrix_range_totals, (db, start, end)),
+    ]
+
+    print(f"{args.students} students x {args.days} days, {args.iterations} runs each")
+    print(f"{'':<20}{'per-row':>12}{'matrix':>12}")
+    for name, rows_fn, matrix_fn, fn_args in cases:
+        # Warm up first so the one-off NumPy import is not timed
+        rows_fn(*fn_args)
+        matrix_fn(*fn_args)
+        before = timeit.timeit(lambda: rows_fn(*fn_args), number=args.iterations)
+        after = timeit.timeit(lambda: matrix_fn(*fn_args), number=args.iterations)
+        print(f"{name:<20}{before / args.iterations * 1000:>10.2f}ms"
+              f"{after / args.iterations * 1000:>10.2f}ms")
+
+    matrix = attendance_app.AttendanceMatrix.load(1, db)
+    streaks = timeit.timeit(matrix.longest_absent_streaks, number=args.iterations)
+    print(f"full matrix: {matrix.codes.nbytes} bytes for {matrix.codes.size} cells, "
+          f"absence streaks {streaks / args.iterations * 1000:.2f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Attendance page render: date chips via list rebuild vs set membership.
+
+Renders attendance.html for a 120-student class with 200 session dates,
+once with the old chip test (rebuilding the student-id list for every
+chip) and once with the precomputed saved_dates set.
+
+    python benchmarks/date_chips.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+os.environ.setdefault("ATTENDANCE_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as attendance_app
+
+OLD_CHIP_TEST = "d in attendance_dict.values()|map(attribute=0)|list"
+NEW_CHIP_TEST = "d in saved_dates"
+
+
+def attendance_context(students=120, session_dates=200):
+    start = date(2026, 1, 1)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(session_dates)]
+    dates.sort(reverse=True)
+    roster = [(sid, f"R{sid:03d}", f"Student {sid}", 1) for sid in range(1, students + 1)]
+
+    return dict(
+        class_id=1, class_name="Class 1",
+        dates=dates, saved_dates=set(dates), selected_date=dates[0],
+        students=roster, page=1, pages=1, total_students=students,
+        attendance_dict={str(r[0]): (r[0], "Present", "") for r in roster},
+        percent_map={}, status_map={},
+    )
+
+
+def main(iterations=50):
+    app = attendance_app.app
+    context = attendance_context()
+    template = attendance_app.TEMPLATES["attendance.html"]
+    old_source = template.replace(NEW_CHIP_TEST, OLD_CHIP_TEST)
+    new_source = template
+
+    with app.test_request_context("/"):
+        app.update_template_context(context)
+        old_template = app.jinja_env.from_string(old_source)
+        new_template = app.jinja_env.from_string(new_source)
+
+        before = timeit.timeit(lambda: old_template.render(**context), number=iterations)
+        after = timeit.timeit(lambda: new_template.render(**context), number=iterations)
+
+    print(f"120 students x 200 session dates, {iterations} renders")
+    print(f"list rebuild per chip: {before / iterations * 1000:.2f} ms")
+    print(f"set membership:        {after / iterations * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,69 @@
+"""Render latency: per-request render_template_string vs precompiled templates.
+
+The "before" column rebuilds each page the old way (inline BASE_STYLES,
+source compiled on every call); "after" renders the DictLoader templates
+that app.py compiles once at startup.
+
+    python benchmarks/render_templates.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+os.environ.setdefault("ATTENDANCE_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template, render_template_string
+
+import app as attendance_app
+
+
+def sample_contexts(classes=40, students=70):
+    stats = attendance_app.build_attendance_stats(120, 90)
+    dashboard = [
+        dict(attendance_app.summarize_class_stats([stats] * students), id=cid, name=f"Class {cid}")
+        for cid in range(1, classes + 1)
+    ]
+    roster = [(sid, f"R{sid:03d}", f"Student {sid}", 1) for sid in range(1, students + 1)]
+
+    return {
+        "dashboard.html": dict(classes=dashboard, admin_exists=True),
+        "attendance.html": dict(
+            class_id=1, class_name="Class 1",
+            dates=[f"2026-01-{d:02d}" for d in range(28, 0, -1)],
+            saved_dates={f"2026-01-{d:02d}" for d in range(1, 28)},
+            selected_date="2026-01-28", students=roster,
+            page=1, pages=1, total_students=students,
+            attendance_dict={str(r[0]): (r[0], "Present", "") for r in roster},
+            percent_map={r[0]: stats["percent"] for r in roster},
+            status_map={r[0]: stats for r in roster},
+        ),
+        "total_report.html": dict(
+            class_id=1, total_students=students,
+            safe_count=students, warning_count=0, defaulter_count=0,
+            rows_url="/report/total/1/rows", export_url="/export/total/excel/1",
+            include_archive=False, archive_toggle_url=None,
+        ),
+    }
+
+
+def main(iterations=50):
+    app = attendance_app.app
+    inline_styles = "<style>" + attendance_app.BASE_STYLES + "</style>"
+
+    print(f"{'template':<22}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    with app.test_request_context("/"):
+        for name, context in sample_contexts().items():
+            source = attendance_app.TEMPLATES[name].replace(attendance_app.STYLES_LINK, inline_styles)
+
+            before = timeit.timeit(lambda: render_template_string(source, **context), number=iterations)
+            after = timeit.timeit(lambda: render_template(name, **context), number=iterations)
+
+            before_ms = before / iterations * 1000
+            after_ms = after / iterations * 1000
+            print(f"{name:<22}{before_ms:>12.2f}{after_ms:>12.2f}{before_ms / after_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
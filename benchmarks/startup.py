@@ -0,0 +1,99 @@
+"""Startup report: import-time breakdown and time to first dashboard.
+
+    python benchmarks/startup.py              # run app.py from source
+    python benchmarks/startup.py --exe dist/app.exe
+
+Source mode runs ``python -X importtime`` on app.py and prints the slowest
+top-level imports, then times a fresh interpreter from launch until "/"
+has rendered. Exe mode starts the packaged build and polls
+http://127.0.0.1:5050/ until the dashboard answers. The exit status is
+non-zero when the time to first dashboard misses its target.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time-to-first-dashboard budgets in seconds
+TARGETS = {"source": 1.0, "exe": 2.5}
+
+FIRST_DASHBOARD = (
+    "import app; app.init_db_if_needed(); "
+    "assert app.app.test_client().get('/').status_code == 200"
+)
+
+
+def bench_env():
+    env = dict(os.environ)
+    env.setdefault("ATTENDANCE_DB", os.path.join(tempfile.mkdtemp(), "startup.db"))
+    return env
+
+
+def import_report(env, top=12):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        label, cumulative_us, name = line.split("|")
+        self_us = label.split(":")[1]
+        name = name[1:]  # drop the separator's space, keep the nesting indent
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative_us, self_us, depth, name in sorted((r for r in rows if r[2] <= 1), reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+
+def time_source(env):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", FIRST_DASHBOARD], cwd=ROOT, env=env, check=True)
+    return time.perf_counter() - started
+
+
+def time_exe(path, env, url="http://127.0.0.1:5050/", timeout=60):
+    started = time.perf_counter()
+    proc = subprocess.Popen([path, "--no-browser"], env=env)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise SystemExit(f"{path} did not serve {url} within {timeout}s")
+    finally:
+        proc.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exe", help="packaged build to time instead of app.py")
+    args = parser.parse_args()
+
+    env = bench_env()
+
+    if args.exe:
+        mode, elapsed = "exe", time_exe(args.exe, env)
+    else:
+        import_report(env)
+        mode, elapsed = "source", time_source(env)
+
+    target = TARGETS[mode]
+    print(f"\ntime to first dashboard ({mode}): {elapsed:.2f}s (target {target:.2f}s)")
+    sys.exit(0 if elapsed <= target else 1)
+
+
+if __name__ == "__main__":
+    main()
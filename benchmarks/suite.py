@@ -0,0 +1,270 @@
+"""Route latency suite against a synthetic institution.
+
+Builds a fresh database with the schema from init_db_if_needed, fills it
+with generated classes, students and attendance, then drives the Flask
+test client through the main pages, saves, imports and exports, waiting
+for background jobs to finish. Reports per-route latency percentiles and
+SQL counts (read from the Server-Timing header) and writes them to JSON
+so runs can be compared across commits.
+
+    python benchmarks/suite.py [--classes 50] [--students 80] [--days 180]
+                               [--iterations 20] [--output benchmarks/results.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Always benchmark a throwaway database, never the real one
+os.environ["ATTENDANCE_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as attendance_app
+
+SERVER_TIMING_SQL = re.compile(r'sql;dur=([\d.]+);desc="(\d+) queries"')
+
+TRIGGER_NAMES = [
+    "trg_students_insert_stats",
+    "trg_students_delete_stats",
+    "trg_attendance_insert_stats",
+    "trg_attendance_delete_stats",
+    "trg_attendance_update_stats",
+]
+
+
+def session_dates(days, end=date(2026, 6, 30)):
+    """The last `days` weekdays up to `end`, oldest first"""
+    dates = []
+    day = end
+    while len(dates) < days:
+        if day.weekday() < 5:
+            dates.append(day.isoformat())
+        day -= timedelta(days=1)
+    return dates[::-1]
+
+
+def generate(conn, classes, students, days, seed):
+    """Fill an empty database; returns the generated session dates"""
+    rng = random.Random(seed)
+    dates = session_dates(days)
+
+    # Per-row stats triggers are the slow part of a bulk load, so drop
+    # them and rebuild student_stats once at the end
+    conn.executescript("".join(f"DROP TRIGGER IF EXISTS {name};" for name in TRIGGER_NAMES))
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO classes (id, class_name) VALUES (?, ?)",
+            [(cid, f"Class {cid:03d}") for cid in range(1, classes + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO students (roll_no, name, class_id) VALUES (?, ?, ?)",
+            [
+                (f"{cid:03d}{n:04d}", f"Student {cid}-{n}", cid)
+                for cid in range(1, classes + 1)
+                for n in range(1, students + 1)
+            ]
+        )
+
+        for sid, cid in conn.execute("SELECT id, class_id FROM students").fetchall():
+            # Each student gets their own attendance habit
+            present_rate = rng.uniform(0.55, 0.98)
+            conn.executemany(
+                "INSERT INTO attendance (student_id, date, status, od_reason) VALUES (?, ?, ?, ?)",
+                [
+                    (sid, day, "Present", None) if roll < present_rate
+                    else (sid, day, "OD", "Event") if roll < present_rate + 0.02
+                    else (sid, day, "Absent", None)
+                    for day, roll in ((day, rng.random()) for day in dates)
+                ]
+            )
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO class_dates (class_id, date) VALUES (?, ?)",
+            [(cid, day) for cid in range(1, classes + 1) for day in dates]
+        )
+
+    conn.executescript(attendance_app.STUDENT_STATS_TRIGGERS_SQL)
+    attendance_app.rebuild_student_stats(conn)
+    return dates
+
+
+def import_workbook(class_id, iteration, rows=50):
+    workbook = attendance_app.openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Roll No", "Name"])
+    for n in range(rows):
+        sheet.append([f"IMP{class_id:03d}{iteration:03d}{n:03d}", f"Imported {n}"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def scenarios(classes, dates, db):
+    """(name, method, url, data factory) for every timed route"""
+    rosters = {
+        cid: [sid for (sid,) in db.execute("SELECT id FROM students WHERE class_id=?", (cid,))]
+        for cid in range(1, classes + 1)
+    }
+    first_students = {cid: ids[0] for cid, ids in rosters.items()}
+    middle = dates[len(dates) // 2]
+    span_start = dates[max(0, len(dates) // 2 - 20)]
+
+    def save_form(cid, i):
+        form = {"class_id": str(cid), "selected_date": dates[i % len(dates)]}
+        for sid in rosters[cid]:
+            form[f"status_{sid}"] = "Absent" if (sid + i) % 5 == 0 else "Present"
+        return form
+
+    return [
+        ("dashboard", "GET", lambda cid, i: "/", None),
+        ("attendance", "GET", lambda cid, i: f"/attendance/{cid}", None),
+        ("day_report", "GET", lambda cid, i: f"/report/day/{cid}?date={middle}", None),
+        ("total_report", "GET", lambda cid, i: f"/report/total/{cid}", None),
+        ("total_report_rows", "GET", lambda cid, i: f"/report/total/{cid}/rows", None),
+        ("student_report", "GET", lambda cid, i: f"/report/student/{first_students[cid]}", None),
+        ("save_attendance", "POST", lambda cid, i: "/save_attendance", save_form),
+        ("import", "POST", lambda cid, i: f"/import/{cid}",
+            lambda cid, i: {"file": (import_workbook(cid, i), "students.xlsx")}),
+        ("export_total", "GET", lambda cid, i: f"/export/total/excel/{cid}", None),
+        ("export_day", "GET", lambda cid, i: f"/export/day/excel/{cid}?date={middle}", None),
+        ("export_range", "POST", lambda cid, i: f"/export/range/excel/{cid}",
+            lambda cid, i: {"start": span_start, "end": middle}),
+    ]
+
+
+def summarize(samples):
+    wall = sorted(s[0] for s in samples)
+    sql = sorted(s[1] for s in samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(attendance_app.percentile(wall, 50), 3),
+        "p90_ms": round(attendance_app.percentile(wall, 90), 3),
+        "p99_ms": round(attendance_app.percentile(wall, 99), 3),
+        "max_ms": round(wall[-1], 3),
+        "mean_ms": round(sum(wall) / len(wall), 3),
+        "sql_p50_ms": round(attendance_app.percentile(sql, 50), 3),
+        "queries": round(sum(s[2] for s in samples) / len(samples), 2),
+    }
+
+
+def wait_for_job(client, response, poll=0.01):
+    """Block until a background job started by response finishes, if any"""
+    location = response.headers.get("Location", "")
+    if "job=" not in location:
+        return
+    job_id = location.split("job=", 1)[1]
+    while True:
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["state"] == "failed":
+            raise SystemExit(f"job {job_id} failed: {job['message']}")
+        if job["state"] == "done":
+            return
+        time.sleep(poll)
+
+
+def run(client, classes, dates, db, iterations, seed):
+    rng = random.Random(seed)
+    results = {}
+    for name, method, url, data in scenarios(classes, dates, db):
+        samples = []
+        for i in range(iterations):
+            cid = rng.randint(1, classes)
+            kwargs = {"data": data(cid, i)} if data else {}
+            if name == "import":
+                kwargs["content_type"] = "multipart/form-data"
+
+            started = time.perf_counter()
+            response = client.open(url(cid, i), method=method, **kwargs)
+            response.get_data()
+            if response.status_code < 400:
+                wait_for_job(client, response)
+            elapsed = (time.perf_counter() - started) * 1000
+
+            if response.status_code >= 400:
+                raise SystemExit(f"{name}: {method} {url(cid, i)} returned {response.status_code}")
+
+            match = SERVER_TIMING_SQL.search(response.headers.get("Server-Timing", ""))
+            sql_ms, queries = (float(match.group(1)), int(match.group(2))) if match else (0.0, 0)
+            samples.append((elapsed, sql_ms, queries))
+
+        results[name] = summarize(samples)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--students", type=int, default=80)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    args = parser.parse_args(argv)
+
+    conn = attendance_app.connect_db()
+    started = time.perf_counter()
+    attendance_app.init_db_if_needed()
+    dates = generate(conn, args.classes, args.students, args.days, args.seed)
+    generated = time.perf_counter() - started
+    rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+    print(f"generated {args.classes} classes x {args.students} students x "
+          f"{args.days} days ({rows} attendance rows) in {generated:.1f}s")
+
+    app = attendance_app.app
+    app.testing = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin"] = True
+
+    routes = run(client, args.classes, dates, conn, args.iterations, args.seed)
+    conn.close()
+
+    print(f"{'route':<20}{'p50':>9}{'p90':>9}{'p99':>9}{'sql p50':>9}{'queries':>9}")
+    for name, stats in routes.items():
+        print(f"{name:<20}{stats['p50_ms']:>9.2f}{stats['p90_ms']:>9.2f}"
+              f"{stats['p99_ms']:>9.2f}{stats['sql_p50_ms']:>9.2f}{stats['queries']:>9.1f}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": {
+            "classes": args.classes,
+            "students_per_class": args.students,
+            "days": args.days,
+            "attendance_rows": rows,
+        },
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "generate_seconds": round(generated, 3),
+        "routes": routes,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
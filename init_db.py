@@ -15,14 +15,14 @@ CREATE TABLE IF NOT EXISTS students (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     roll_no TEXT,
     name TEXT,
-    class_id INTEGER
+    class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE
 )
 """)
 
 c.execute("""
 CREATE TABLE IF NOT EXISTS attendance (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    student_id INTEGER,
+    student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
     date TEXT,
     status TEXT,
     od_reason TEXT,
@@ -30,6 +30,10 @@ CREATE TABLE IF NOT EXISTS attendance (
 )
 """)
 
+c.execute("CREATE INDEX IF NOT EXISTS idx_students_class_roll ON students(class_id, roll_no)")
+c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_student ON attendance(date, student_id)")
+c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance(student_id, date)")
+
 c.execute("""
 CREATE TABLE IF NOT EXISTS admin (
     id INTEGER PRIMARY KEY,